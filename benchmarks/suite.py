@@ -0,0 +1,299 @@
+"""Benchmark Database methods and the pandas computations at several data sizes.
+
+Run from the repository root:
+
+    python benchmarks/suite.py --sizes 10k,100k --output results.json
+    python benchmarks/suite.py --sizes 10k --compare results.json
+
+Each size is a synthetic database with that many purchases and sales (see
+synthetic.spec_for_rows). Generated databases are kept in --data-dir and
+reused by later runs with the same size, seed and schema version, and
+every run works on a fresh copy so write benchmarks don't accumulate.
+The query cache is off while timing, except for the cache_hit case.
+
+The startup group runs the app itself in a fresh interpreter per repeat
+(Streamlit's AppTest, logged in) and times its first script run, which
+includes importing the app, opening the database and loading the session
+tables, and then a second, warm rerun.
+
+Results are written as JSON: a "meta" block (versions, commit, host)
+and one record per benchmark and size with best / median / mean seconds.
+--compare prints the ratio of each best time against an earlier file.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import migrations
+from config import Config
+from database import Database, apply_delta, typed_frame
+from synthetic import populate, sku_names, spec_for_rows
+
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+def time_calls(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def prepare_database(rows, seed, data_dir):
+    """Return the path of a generated database for this size, creating it if needed"""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f"synthetic-{rows}-seed{seed}-v{migrations.LATEST_VERSION}.db"
+    if not path.exists():
+        start = time.perf_counter()
+        staging = path.with_suffix('.tmp')
+        staging.unlink(missing_ok=True)
+        db = Database(str(staging), uploads_dir=data_dir / 'uploads')
+        populate(db, seed=seed, **spec_for_rows(rows))
+        db.close()
+        # Fold the WAL back in so the single file can be copied
+        conn = sqlite3.connect(staging)
+        conn.execute('PRAGMA journal_mode = DELETE')
+        conn.close()
+        staging.rename(path)
+        print(f"  generated {path.name} in {time.perf_counter() - start:.1f}s")
+    return path
+
+def database_cases(db, rows):
+    """(name, callable) pairs for Database methods, reads first then writes"""
+    spec = spec_for_rows(rows)
+    sku = sku_names(spec['n_skus'])[spec['n_skus'] // 2]
+    today = date(2024, 1, 1)
+    with db.get_connection() as conn:
+        max_sale = conn.execute('SELECT MAX(id) FROM sales').fetchone()[0]
+        max_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+        open_credits = [row[0] for row in conn.execute(
+            "SELECT id FROM credit_book WHERE status = 'Pending' LIMIT 50"
+        )]
+    # Rows already in the target status are skipped, so alternate to
+    # write all 50 (and fire their triggers) on every run
+    credit_statuses = itertools.cycle(['Paid', 'Pending'])
+    return [
+        ('get_inventory', db.get_inventory),
+        ('get_sales', db.get_sales),
+        ('get_credit_book', db.get_credit_book),
+        ('get_delta_sales_100', lambda: db.get_delta('sales', max_sale - 100, max_seq)),
+        ('get_inventory_page', lambda: db.get_inventory_page()),
+        ('get_inventory_page_search', lambda: db.get_inventory_page(search=sku[:8])),
+        ('get_inventory_totals', lambda: db.get_inventory_totals()),
+        ('get_low_stock_page', lambda: db.get_low_stock_page(5)),
+        ('get_sales_page', lambda: db.get_sales_page()),
+        ('get_sales_page_search', lambda: db.get_sales_page(search=sku)),
+        ('get_credit_page_active', lambda: db.get_credit_page(settled=False)),
+        ('get_sales_totals', lambda: db.get_sales_totals()),
+        ('get_dashboard_metrics', db.get_dashboard_metrics),
+        ('get_stock_movement', lambda: db.get_stock_movement()),
+        ('get_stock_levels', db.get_stock_levels),
+        ('get_stock_level', lambda: db.get_stock_level(sku)),
+        ('get_daily_sales', lambda: db.get_daily_sales()),
+        ('get_sales_by_category', lambda: db.get_sales_by_category()),
+        ('search_item', lambda: db.search(sku)),
+        ('search_customer', lambda: db.search('sharma 12', table='credit_book')),
+        ('get_credit_aging', lambda: db.get_credit_aging(as_of=today)),
+        ('get_customer_aging', lambda: db.get_customer_aging(as_of=today)),
+        ('get_overdue_credits', lambda: db.get_overdue_credits(as_of=today, limit=50)),
+        ('get_documents', lambda: db.get_documents('sales', 1)),
+        ('add_sale', lambda: db.add_sale(
+            sku, 'General', 1, today, 100.0, 100.0, 60.0, 40.0, 'Cash', 100.0, 0.0
+        )),
+        ('add_inventory_item', lambda: db.add_inventory_item(
+            sku, 'General', 10, today, 500.0, 10.0, 51.0, 'Cera'
+        )),
+        ('add_credit_entry', lambda: db.add_credit_entry(
+            'Benchmark Customer', 500.0, today, today, 'benchmark', '9800000000', 'Pending'
+        )),
+        ('update_credit_statuses_50', lambda: db.update_credit_statuses(
+            open_credits, next(credit_statuses)
+        )),
+        ('rebuild_stock_levels', db.rebuild_stock_levels),
+        ('rebuild_daily_sales_summary', db.rebuild_daily_sales_summary),
+    ]
+
+def computation_cases(db):
+    """(name, callable) pairs for the pandas work the pages do on loaded frames"""
+    sales = db.get_sales()
+    with db.get_connection() as conn:
+        raw_sales = pd.read_sql_query('SELECT * FROM sales', conn)
+        max_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+    # A delta of the newest 1% of sales, applied to the rest
+    cutoff = int(sales['id'].quantile(0.99))
+    delta = db.get_delta('sales', cutoff, max_seq)
+    base = sales[sales['id'] <= cutoff]
+    return [
+        ('sales_metrics', lambda: (
+            sales['sale_price'].sum(), sales['amount_pending'].sum(),
+            (sales['profit_per_unit'] * sales['quantity']).sum(),
+            sales.groupby('category', observed=True)['sale_price'].sum()
+        )),
+        ('apply_delta_sales', lambda: apply_delta(base, delta)),
+        ('typed_frame_sales', lambda: typed_frame(raw_sales.copy())),
+    ]
+
+# Runs in a fresh interpreter: argv[1] is the app script. Prints the
+# seconds taken by the first script run and by a rerun.
+STARTUP_SCRIPT = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+app.session_state['password_correct'] = True
+start = time.perf_counter()
+app.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - start
+if app.exception:
+    sys.exit(app.exception[0].value)
+print(first, rerun)
+"""
+
+def startup_timings(db_path, tmp, repeat):
+    """Time the app's first run and a rerun, each in a fresh process"""
+    env = dict(
+        os.environ, STREAMLIT_ENV='production', DATABASE_URL=str(db_path),
+        UPLOADS_DIR=str(Path(tmp) / 'uploads'), QUERY_LOG_PATH=str(Path(tmp) / 'queries.log'),
+        TRACE_PATH=str(Path(tmp) / 'trace.json'),
+    )
+    first, rerun = [], []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT, str(ROOT / 'inventory_app.py')],
+            cwd=ROOT, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"app failed to start: {result.stderr.strip()[-500:]}")
+        seconds = result.stdout.split()[-2:]
+        first.append(float(seconds[0]))
+        rerun.append(float(seconds[1]))
+    return first, rerun
+
+def run_size(rows, args):
+    print(f"{rows:,} rows")
+    source = prepare_database(rows, args.seed, Path(args.data_dir))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        shutil.copyfile(source, db_path)
+        db = Database(str(db_path), uploads_dir=Path(tmp) / 'uploads')
+
+        cases = [('database', name, func) for name, func in database_cases(db, rows)]
+        cases += [('computation', name, func) for name, func in computation_cases(db)]
+        for group, name, func in cases:
+            if args.only and not any(pattern in name for pattern in args.only):
+                continue
+            timings = time_calls(func, args.repeat)
+            results.append(record(group, name, rows, timings))
+            print(f"  {name:<30} {min(timings) * 1000:>10.3f} ms")
+
+        # The cost of a page asking again for data that hasn't changed
+        Config.QUERY_CACHE_ENABLED = True
+        db.get_dashboard_metrics()
+        timings = time_calls(db.get_dashboard_metrics, args.repeat)
+        Config.QUERY_CACHE_ENABLED = False
+        results.append(record('database', 'cache_hit', rows, timings))
+        print(f"  {'cache_hit':<30} {min(timings) * 1000:>10.3f} ms")
+        db.close()
+
+        if not args.only or any(pattern in 'startup' for pattern in args.only):
+            shutil.copyfile(source, db_path)
+            for name, timings in zip(('startup_first_run', 'startup_rerun'),
+                                     startup_timings(db_path, tmp, args.repeat)):
+                results.append(record('startup', name, rows, timings))
+                print(f"  {name:<30} {min(timings) * 1000:>10.3f} ms")
+    return results
+
+def record(group, name, rows, timings):
+    return {
+        'group': group,
+        'name': name,
+        'rows': rows,
+        'repeat': len(timings),
+        'best': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+    }
+
+def metadata(args):
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'schema_version': migrations.LATEST_VERSION,
+    }
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['name'], r['rows']): r['best'] for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path} (ratio < 1 is faster):")
+    for r in results:
+        before = baseline.get((r['name'], r['rows']))
+        if before:
+            print(f"  {r['name']:<30} {r['rows']:>9,} {r['best'] / before:>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10k,100k,1m',
+                        help="comma-separated row counts, e.g. 10k,100k,1m")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='*', help="run benchmarks whose name contains any of these")
+    parser.add_argument('--data-dir', default=str(Path(tempfile.gettempdir()) / 'mgs-bench'),
+                        help="where generated databases are kept between runs")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    Config.QUERY_CACHE_ENABLED = False
+    results = []
+    for size in args.sizes.split(','):
+        results.extend(run_size(parse_size(size), args))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': metadata(args), 'results': results}, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Reproducible synthetic data for benchmarks.
+
+populate() fills a database through the real schema, so triggers keep
+stock_levels, daily_sales_summary and the search indexes in step exactly
+as they would in the app. The same seed always gives the same data.
+
+To create a standalone database to poke at:
+
+    python benchmarks/synthetic.py /tmp/demo.db --sales 100000
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+CATEGORIES = np.array(['General', 'Electronics', 'Clothing', 'Food'], dtype=object)
+SUPPLIERS = np.array(['Jaquar', 'Hindware', 'Cera', 'Parryware', 'Kohler'], dtype=object)
+PAYMENT_TYPES = np.array(['Cash', 'UPI', 'Card', 'Credit', 'Partial'], dtype=object)
+CUSTOMERS = np.array(['Sharma', 'Verma', 'Gupta', 'Patel', 'Singh', 'Iyer'], dtype=object)
+START_DATE = date(2022, 1, 1)
+DAYS = 730
+
+def sku_names(n_skus):
+    return np.array([f"SKU-{i:06d}" for i in range(n_skus)], dtype=object)
+
+def _dates(rng, n):
+    days = np.array([str(START_DATE + timedelta(days=i)) for i in range(DAYS)], dtype=object)
+    return days[rng.integers(0, DAYS, n)]
+
+def populate(db, n_skus=1_000, n_purchases=10_000, n_sales=10_000, n_credits=1_000,
+             n_documents=1_000, seed=0):
+    """Insert synthetic rows into every table of `db` and return the row counts.
+
+    Each table is written with one executemany in one transaction. Document
+    rows point at files that don't exist, which is enough for the
+    documents queries.
+    """
+    rng = np.random.default_rng(seed)
+    skus = sku_names(n_skus)
+    # Every SKU is purchased at least once so sales always refer to stock
+    sku_codes = np.concatenate([
+        np.arange(min(n_skus, n_purchases)),
+        rng.integers(0, n_skus, max(n_purchases - n_skus, 0))
+    ])
+    sku_category = CATEGORIES[rng.integers(0, len(CATEGORIES), n_skus)]
+
+    quantity = rng.integers(1, 100, n_purchases)
+    total_price = np.round(quantity * rng.uniform(10, 500, n_purchases), 2)
+    expenses = np.round(total_price * rng.uniform(0, 0.1, n_purchases), 2)
+    inventory_rows = zip(
+        skus[sku_codes], sku_category[sku_codes], quantity.tolist(), _dates(rng, n_purchases),
+        total_price.tolist(), expenses.tolist(),
+        np.round((total_price + expenses) / quantity, 2).tolist(),
+        SUPPLIERS[rng.integers(0, len(SUPPLIERS), n_purchases)]
+    )
+
+    sale_codes = rng.integers(0, n_skus, n_sales)
+    sold = rng.integers(1, 5, n_sales)
+    unit_price = np.round(rng.uniform(20, 800, n_sales), 2)
+    unit_cost = np.round(unit_price * rng.uniform(0.5, 0.9, n_sales), 2)
+    payment = PAYMENT_TYPES[rng.integers(0, len(PAYMENT_TYPES), n_sales)]
+    sale_price = np.round(sold * unit_price, 2)
+    pending = np.where(
+        payment == 'Credit', sale_price,
+        np.where(payment == 'Partial', np.round(sale_price / 2, 2), 0.0)
+    )
+    sales_rows = zip(
+        skus[sale_codes], sku_category[sale_codes], sold.tolist(), _dates(rng, n_sales),
+        sale_price.tolist(), unit_price.tolist(), unit_cost.tolist(),
+        (unit_price - unit_cost).tolist(), payment,
+        (sale_price - pending).tolist(), pending.tolist()
+    )
+
+    credit_dates = pd.to_datetime(_dates(rng, n_credits))
+    due_dates = credit_dates + pd.to_timedelta(rng.integers(7, 60, n_credits), unit='D')
+    credit_rows = zip(
+        [f"{name} {i % 997}" for i, name in
+         enumerate(CUSTOMERS[rng.integers(0, len(CUSTOMERS), n_credits)])],
+        np.round(rng.uniform(100, 20_000, n_credits), 2).tolist(),
+        credit_dates.strftime('%Y-%m-%d'), due_dates.strftime('%Y-%m-%d'),
+        [f"Bill for {sku}" for sku in skus[rng.integers(0, n_skus, n_credits)]],
+        [f"98{n:08d}" for n in rng.integers(0, 10**8, n_credits)],
+        np.where(rng.random(n_credits) < 0.6, 'Paid', 'Pending')
+    )
+
+    reference_types = np.array(['inventory', 'sales', 'credit'], dtype=object)
+    document_refs = reference_types[rng.integers(0, 3, n_documents)]
+    document_rows = (
+        (ref, int(ref_id), f"/nonexistent/{ref}/{i:08x}.jpg", f"bill-{i}.jpg",
+         f"{i:064x}", 100_000)
+        for i, (ref, ref_id) in enumerate(zip(
+            document_refs, rng.integers(1, max(min(n_purchases, n_sales), 1) + 1, n_documents)
+        ))
+    )
+
+    with db.get_connection() as conn:
+        conn.executemany('''
+            INSERT INTO inventory (item, category, quantity_purchased, date_purchased,
+                total_purchase_price, variable_expenses, cost_per_unit, supplier)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', inventory_rows)
+        conn.executemany('''
+            INSERT INTO sales (product_id, category, quantity, sale_date, sale_price,
+                price_per_unit, cost_per_unit, profit_per_unit, payment_type,
+                amount_received, amount_pending)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', sales_rows)
+        conn.executemany('''
+            INSERT INTO credit_book (customer, amount, date, due_date, description, contact, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', credit_rows)
+        conn.executemany('''
+            INSERT INTO documents (reference_type, reference_id, file_path, file_name, sha256, size)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', document_rows)
+    db.analyze()
+    return {
+        'skus': n_skus, 'inventory': n_purchases, 'sales': n_sales,
+        'credit_book': n_credits, 'documents': n_documents,
+    }
+
+def spec_for_rows(rows):
+    """Table sizes for a benchmark size: `rows` purchases and sales, a tenth as many credits and documents"""
+    return {
+        'n_skus': max(100, rows // 100),
+        'n_purchases': rows,
+        'n_sales': rows,
+        'n_credits': max(100, rows // 10),
+        'n_documents': max(100, rows // 10),
+    }
+
+def main():
+    from database import Database
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('db_path')
+    parser.add_argument('--skus', type=int, default=1_000)
+    parser.add_argument('--purchases', type=int, default=10_000)
+    parser.add_argument('--sales', type=int, default=10_000)
+    parser.add_argument('--credits', type=int, default=1_000)
+    parser.add_argument('--documents', type=int, default=1_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = Database(args.db_path, uploads_dir=Path(args.db_path).parent / 'uploads')
+    counts = populate(db, args.skus, args.purchases, args.sales, args.credits,
+                      args.documents, args.seed)
+    db.close()
+    print(f"Wrote {counts} to {args.db_path} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == '__main__':
+    main()
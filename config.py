@@ -3,7 +3,7 @@ from pathlib import Path
 
 class Config:
     # Base directory of the application
-    BASE_DIR = Path(__file__).parent.parent
+    BASE_DIR = Path(__file__).parent
 
     # Environment
     ENV = os.getenv('STREAMLIT_ENV', 'development')
@@ -16,12 +16,55 @@ class Config:
         DB_PATH = str(BASE_DIR / 'inventory.db')
         UPLOADS_DIR = BASE_DIR / 'uploads'
 
-    # Create necessary directories
-    UPLOADS_DIR.mkdir(exist_ok=True)
-    (UPLOADS_DIR / 'inventory').mkdir(exist_ok=True)
-    (UPLOADS_DIR / 'sales').mkdir(exist_ok=True)
-    (UPLOADS_DIR / 'credit').mkdir(exist_ok=True)
+    # Directories under UPLOADS_DIR and the log directory are created on
+    # first write, so importing Config touches no files
+
+    # SQLite connection pool and pragmas
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+    DB_JOURNAL_MODE = os.getenv('DB_JOURNAL_MODE', 'WAL')
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+    DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 20000))  # ~20MB page cache per connection
+    DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 256 * 1024 * 1024))  # 256MB memory-mapped I/O
+
+    # Shared query-result cache
+    QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', '1') == '1'
+    QUERY_CACHE_MAX_BYTES = int(os.getenv('QUERY_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Incremental table refreshes
+    DELTA_MAX_CHANGES = int(os.getenv('DELTA_MAX_CHANGES', 1000))  # more changes than this reload the table
+
+    # Query instrumentation and slow-query log
+    QUERY_STATS_ENABLED = os.getenv('QUERY_STATS_ENABLED', '1') == '1'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+    QUERY_LOG_PATH = Path(os.getenv('QUERY_LOG_PATH', str(BASE_DIR / 'logs' / 'queries.log')))
+    QUERY_LOG_MAX_BYTES = int(os.getenv('QUERY_LOG_MAX_BYTES', 5 * 1024 * 1024))
+    QUERY_LOG_BACKUPS = int(os.getenv('QUERY_LOG_BACKUPS', 3))
+
+    # Per-rerun tracing of the app script
+    TRACE_ENABLED = os.getenv('TRACE_ENABLED', '1') == '1'  # write spans to TRACE_PATH
+    TRACE_PATH = Path(os.getenv('TRACE_PATH', str(BASE_DIR / 'logs' / 'trace.json')))
+    TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', 20 * 1024 * 1024))
+    TRACE_HISTORY = 200  # reruns kept per page for the latency percentiles
+
+    # HTTP client for remote documents
+    HTTP_TIMEOUT = (5, 30)  # (connect, read) seconds
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+    HTTP_CACHE_DIR = UPLOADS_DIR / 'http_cache'
+    HTTP_CACHE_FRESH_SECONDS = int(os.getenv('HTTP_CACHE_FRESH_SECONDS', 300))
+
+    # Startup
+    WARMUP_ON_START = os.getenv('WARMUP_ON_START', '0') == '1'  # preload caches when the server starts
 
     # App settings
+    PAGE_SIZE = int(os.getenv('PAGE_SIZE', 50))  # rows per page in paged tables and lists
+    SEARCH_RANK_CANDIDATES = 250  # newest full-text matches scored when ranking
     MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
-    ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.pdf', '.gif'} 
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.pdf', '.gif'}
+    THUMBNAIL_SIZE = (320, 320)
+    THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv('THUMBNAIL_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+    UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', 3))
+    UPLOAD_MAX_ATTEMPTS = int(os.getenv('UPLOAD_MAX_ATTEMPTS', 3))
+    UPLOAD_RETRY_BACKOFF = 1.0  # seconds, doubled after each failed attempt 
\ No newline at end of file
@@ -1,101 +1,303 @@
 import sqlite3
-from datetime import datetime
+import re
+from datetime import date, timedelta
 import pandas as pd
 import os
-from pathlib import Path
-import shutil
+import queue
+import threading
+from contextlib import contextmanager
+from config import Config
+from instrumentation import InstrumentedConnection, instrument_methods
+import migrations
+from query_cache import cached_query
+from storage import LocalStorage
+from thumbnails import ThumbnailCache
+from uploads import UploadQueue
 
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared between threads"""
+
+    # One read-only watcher connection per database file, shared by every
+    # pool on that file so their data versions are comparable
+    _watchers = {}
+    _watchers_lock = threading.Lock()
+
+    def __init__(self, db_path, size=None, timeout=None):
+        self.db_path = db_path
+        self.key = os.path.abspath(db_path)
+        self.size = size or Config.DB_POOL_SIZE
+        self.timeout = timeout if timeout is not None else Config.DB_POOL_TIMEOUT
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # Connection currently checked out by each thread, so nested
+        # get_connection() calls reuse it instead of deadlocking the pool
+        self._local = threading.local()
+
+    def _connect(self, instrumented=True):
+        """Open a connection and apply the configured pragmas"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=Config.DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            factory=(
+                InstrumentedConnection if instrumented and Config.QUERY_STATS_ENABLED
+                else sqlite3.Connection
+            )
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}")
+        conn.execute(f"PRAGMA journal_mode = {Config.DB_JOURNAL_MODE}")
+        conn.execute(f"PRAGMA synchronous = {Config.DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = -{int(Config.DB_CACHE_SIZE_KB)}")
+        conn.execute(f"PRAGMA mmap_size = {int(Config.DB_MMAP_SIZE)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def acquire(self):
+        """Take an idle connection, opening a new one while under the pool size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out after {self.timeout}s waiting for a database connection"
+            )
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any unfinished transaction"""
+        if conn.in_transaction:
+            conn.rollback()
+        if getattr(conn, 'slow_statements', None):
+            conn.log_slow_statements()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a with-block.
+
+        Commits on success and rolls back on error, like using a plain
+        sqlite3 connection as a context manager.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.conn = None
+            self.release(conn)
+
+    def data_version(self):
+        """Counter that changes whenever any connection commits a write.
+
+        PRAGMA data_version only moves for commits made by other
+        connections, so it is read on a watcher that never writes.
+        """
+        with ConnectionPool._watchers_lock:
+            watcher = ConnectionPool._watchers.get(self.key)
+            if watcher is None:
+                watcher = ConnectionPool._watchers[self.key] = (
+                    self._connect(instrumented=False), threading.Lock()
+                )
+        conn, lock = watcher
+        with lock:
+            return conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+# Column dtypes applied to every DataFrame the Database returns. Repeated
+# labels become categoricals, text dates become datetimes and integer
+# columns drop to int32; money stays float64 so totals keep their paise.
+CATEGORICAL_COLUMNS = {'item', 'product_id', 'category', 'supplier', 'payment_type', 'status'}
+DATE_COLUMNS = {'date_purchased', 'sale_date', 'date', 'due_date', 'created_at', 'upload_date'}
+INTEGER_COLUMNS = {
+    'id', 'quantity', 'quantity_purchased', 'reference_id',
+    'purchased', 'sold', 'on_hand', 'quantity_bought', 'quantity_sold',
+    'quantity_remaining', 'Total Sold', 'Remaining Quantity'
+}
+
+def typed_frame(df):
+    """Convert a freshly read DataFrame to compact, typed columns"""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in CATEGORICAL_COLUMNS:
+            columns[col] = series.astype('category')
+        elif col in DATE_COLUMNS:
+            columns[col] = pd.to_datetime(series, format='ISO8601', errors='coerce')
+        elif col in INTEGER_COLUMNS and not series.isna().any():
+            columns[col] = series.astype('int32')
+    return df.assign(**columns) if columns else df
+
+def _concat_typed(frames):
+    """Concatenate typed frames, keeping categorical columns categorical.
+
+    pd.concat falls back to object dtype when categories differ, so the
+    categoricals are first widened to the union of their categories.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    first = frames[0]
+    for col in first.columns:
+        if isinstance(first[col].dtype, pd.CategoricalDtype):
+            categories = pd.Index(first[col].cat.categories)
+            for frame in frames[1:]:
+                categories = categories.union(frame[col].cat.categories, sort=False)
+            frames = [
+                frame.assign(**{col: frame[col].cat.set_categories(categories)})
+                for frame in frames
+            ]
+    return pd.concat(frames, ignore_index=True)
+
+# Credit aging buckets, by days past due, as (bucket, due_date lower
+# bound, upper bound) with bounds naming cutoff dates from aging_params().
+# Each bucket is a due_date range, so it can be summed straight off the
+# (status, due_date) index.
+AGING_RANGES = [
+    ('current', 'as_of', None),
+    ('1-30', 'overdue_30', 'as_of'),
+    ('31-60', 'overdue_60', 'overdue_30'),
+    ('61-90', 'overdue_90', 'overdue_60'),
+    ('90+', None, 'overdue_90'),
+]
+AGING_BUCKETS = [bucket for bucket, _, _ in AGING_RANGES]
+
+def _aging_condition(lower, upper):
+    conditions = []
+    if lower:
+        conditions.append(f"due_date >= :{lower}")
+    if upper:
+        conditions.append(f"due_date < :{upper}")
+    return ' AND '.join(conditions)
+
+# Assigns an outstanding credit_book row to its bucket
+AGING_BUCKET_SQL = 'CASE {} END'.format(' '.join(
+    f"WHEN {_aging_condition(lower, upper)} THEN '{bucket}'" if lower
+    else f"ELSE '{bucket}'"
+    for bucket, lower, upper in AGING_RANGES
+))
+
+def aging_params(as_of):
+    """Query parameters for AGING_BUCKET_SQL as of an ISO date string"""
+    day = date.fromisoformat(as_of)
+    params = {'as_of': as_of}
+    for days in (30, 60, 90):
+        params[f'overdue_{days}'] = str(day - timedelta(days=days))
+    return params
+
+# Row order of each change-tracked table as (column, ascending) pairs,
+# matching the order its get_* method returns
+DELTA_ORDER = {
+    'inventory': [('id', True)],
+    'sales': [('id', True)],
+    'credit_book': [('date', False), ('id', False)],
+}
+
+def apply_delta(frame, delta):
+    """Merge a Database.get_delta() result into a previously loaded DataFrame"""
+    rows = delta['rows']
+    if delta['full']:
+        return rows
+    stale = set(delta['deleted'])
+    if not rows.empty:
+        stale.update(rows['id'])
+    if stale and not frame.empty:
+        frame = frame[~frame['id'].isin(stale)]
+    if rows.empty:
+        return frame.reset_index(drop=True)
+    if frame.empty:
+        return rows
+
+    order = DELTA_ORDER[delta['table']]
+    merged = _concat_typed([frame, rows])
+    # New rows of an id-ordered table already sort after the existing ones
+    if order == [('id', True)] and rows['id'].min() > frame['id'].max():
+        return merged
+    return merged.sort_values(
+        [col for col, _ in order],
+        ascending=[ascending for _, ascending in order],
+        ignore_index=True
+    )
+
+def fts_query(text, column=None):
+    """Turn search box text into an FTS5 prefix query, or None if it has no words.
+
+    Every word must match as a prefix, so "bath ta" finds "Bath Tap".
+    Words are quoted, which keeps FTS5 syntax characters in the input
+    from being interpreted.
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    query = ' '.join(f'"{word}"*' for word in words)
+    if column:
+        query = f'{{{column}}} : ({query})'
+    return query
+
+# Every public method is timed; see instrumentation.py
+@instrument_methods(exclude=('get_connection', 'close'))
 class Database:
-    def __init__(self, db_path="inventory.db"):
+    def __init__(self, db_path="inventory.db", uploads_dir=None):
         self.db_path = db_path
-        # Create uploads directory if it doesn't exist
-        self.uploads_dir = Path("uploads")
-        self.uploads_dir.mkdir(exist_ok=True)
+        self.pool = ConnectionPool(db_path)
+        self.storage = LocalStorage(uploads_dir)
+        self.uploads_dir = self.storage.root
+        self.thumbnails = ThumbnailCache(self.storage.root)
         self.init_database()
+        # Started after migrating, since it resumes jobs from upload_jobs
+        self.uploads = UploadQueue.shared(self)
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        """Borrow a pooled connection; use as `with db.get_connection() as conn:`"""
+        return self.pool.connection()
+
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.close()
 
     def init_database(self):
-        """Initialize database tables if they don't exist"""
+        """Bring the schema up to date through the migration engine"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Recreate credit_book table with new schema
-            self.recreate_credit_book_table()
-            
-            # Create inventory table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS inventory (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    item TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    quantity_purchased INTEGER NOT NULL,
-                    date_purchased DATE NOT NULL,
-                    total_purchase_price REAL NOT NULL,
-                    variable_expenses REAL NOT NULL,
-                    cost_per_unit REAL NOT NULL,
-                    supplier TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            migrations.migrate(conn)
 
-            # Create sales table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sales (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    sale_date DATE NOT NULL,
-                    sale_price REAL NOT NULL,
-                    price_per_unit REAL NOT NULL,
-                    cost_per_unit REAL NOT NULL,
-                    profit_per_unit REAL NOT NULL,
-                    payment_type TEXT NOT NULL,
-                    amount_received REAL NOT NULL,
-                    amount_pending REAL NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            # Add documents table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS documents (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    reference_type TEXT NOT NULL,
-                    reference_id INTEGER NOT NULL,
-                    file_path TEXT NOT NULL,
-                    file_name TEXT NOT NULL,
-                    upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+    def analyze(self):
+        """Refresh query planner statistics, e.g. after a bulk import.
 
-            conn.commit()
-
-    def recreate_credit_book_table(self):
-        """Recreate credit_book table with updated schema"""
+        Only the indexed tables are analyzed, as in migrations._create_indexes,
+        so the FTS shadow tables keep no statistics.
+        """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Drop existing table
-            cursor.execute('DROP TABLE IF EXISTS credit_book')
-            
-            # Create new table with contact field
-            cursor.execute('''
-                CREATE TABLE credit_book (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    date DATE NOT NULL,
-                    due_date DATE NOT NULL,
-                    description TEXT,
-                    contact TEXT,
-                    status TEXT DEFAULT 'Pending',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
+            for table in dict.fromkeys(table for _, table, _ in migrations.INDEXES):
+                conn.execute(f'ANALYZE {table}')
 
     # Inventory Methods
     def add_inventory_item(self, item, category, quantity, date, total_price, expenses, cost_per_unit, supplier):
@@ -107,11 +309,14 @@ class Database:
                     total_purchase_price, variable_expenses, cost_per_unit, supplier
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (item, category, quantity, date, total_price, expenses, cost_per_unit, supplier))
+            item_id = cursor.lastrowid
             conn.commit()
+            return item_id
 
+    @cached_query
     def get_inventory(self):
         with self.get_connection() as conn:
-            return pd.read_sql_query("SELECT * FROM inventory", conn)
+            return typed_frame(pd.read_sql_query("SELECT * FROM inventory", conn))
 
     # Sales Methods
     def add_sale(self, product_id, category, quantity, sale_date, sale_price, 
@@ -128,19 +333,23 @@ class Database:
             ''', (product_id, category, quantity, sale_date, sale_price,
                   price_per_unit, cost_per_unit, profit_per_unit,
                   payment_type, amount_received, amount_pending))
+            sale_id = cursor.lastrowid
             conn.commit()
+            return sale_id
 
+    @cached_query
     def get_sales(self):
         with self.get_connection() as conn:
-            return pd.read_sql_query("SELECT * FROM sales", conn)
+            return typed_frame(pd.read_sql_query("SELECT * FROM sales", conn))
 
     # Credit Book Methods
+    @cached_query
     def get_credit_book(self):
         """Simple function to get all credits"""
-        query = "SELECT * FROM credit_book ORDER BY date DESC"
+        query = "SELECT * FROM credit_book ORDER BY date DESC, id DESC"
         
         with self.get_connection() as conn:
-            return pd.read_sql_query(query, conn)
+            return typed_frame(pd.read_sql_query(query, conn))
 
     def add_credit_entry(self, customer, amount, date, due_date, description, contact, status):
         """Add a new credit entry"""
@@ -169,53 +378,581 @@ class Database:
             conn.commit()
             return True
 
-    # Utility Methods
-    def calculate_total_quantity(self, item):
-        """Calculate current quantity for an item"""
+    def update_credit_statuses(self, credit_ids, new_status):
+        """Set the status of several credit entries in one transaction and return how many changed"""
+        query = "UPDATE credit_book SET status = ? WHERE id = ? AND status != ?"
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                query, [(new_status, int(credit_id), new_status) for credit_id in credit_ids]
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    # Credit Aging Methods
+    def get_credit_aging(self, as_of=None):
+        """Get count and amount of outstanding credit per aging bucket.
+
+        Buckets are AGING_BUCKETS, by days past due_date as of `as_of`
+        (default today); every bucket is present, empty ones as zero.
+        """
+        return self._credit_aging(str(as_of or date.today()))
+
+    def get_customer_aging(self, as_of=None, limit=None):
+        """Get outstanding credit per customer, split by aging bucket, largest total first"""
+        return self._customer_aging(str(as_of or date.today()), limit)
+
+    def get_overdue_credits(self, as_of=None, limit=None):
+        """Get outstanding entries past their due date, most overdue first"""
+        return self._overdue_credits(str(as_of or date.today()), limit)
+
+    # The public methods resolve `as_of` before calling these, so a cached
+    # result is never reused after the date changes
+    @cached_query
+    def _credit_aging(self, as_of):
+        # One index range scan per bucket, rather than a CASE per row and a
+        # sort for GROUP BY
+        query = ' UNION ALL '.join(
+            f'''
+            SELECT '{bucket}' AS bucket, COUNT(*) AS entries, COALESCE(SUM(amount), 0) AS amount
+            FROM credit_book
+            WHERE status = 'Pending' AND {_aging_condition(lower, upper)}
+            '''
+            for bucket, lower, upper in AGING_RANGES
+        )
+        with self.get_connection() as conn:
+            aging = pd.read_sql_query(query, conn, params=aging_params(as_of))
+        aging['entries'] = aging['entries'].astype('int32')
+        return aging
+
+    @cached_query
+    def _customer_aging(self, as_of, limit):
+        query = f'''
+            SELECT customer, {AGING_BUCKET_SQL} AS bucket,
+                   COUNT(*) AS entries, SUM(amount) AS amount, MIN(due_date) AS due_date
+            FROM credit_book
+            WHERE status = 'Pending'
+            GROUP BY customer, bucket
+        '''
+        with self.get_connection() as conn:
+            rows = typed_frame(pd.read_sql_query(query, conn, params=aging_params(as_of)))
+
+        # Pivot the customer x bucket rows, far fewer than credit entries
+        customers = rows.pivot_table(
+            index='customer', columns='bucket', values='amount', aggfunc='sum', fill_value=0
+        ).reindex(columns=AGING_BUCKETS, fill_value=0)
+        customers.columns.name = None
+        grouped = rows.groupby('customer')
+        customers.insert(0, 'total', grouped['amount'].sum())
+        customers.insert(0, 'entries', grouped['entries'].sum())
+        customers['due_date'] = grouped['due_date'].min()
+        customers = customers.sort_values('total', ascending=False).reset_index()
+        if limit is not None:
+            customers = customers.head(limit)
+        return customers
+
+    @cached_query
+    def _overdue_credits(self, as_of, limit):
+        query = '''
+            SELECT id, customer, amount, date, due_date, contact, description,
+                   CAST(julianday(:as_of) - julianday(due_date) AS INTEGER) AS days_overdue
+            FROM credit_book
+            WHERE status = 'Pending' AND due_date < :as_of
+            ORDER BY due_date, id
+        '''
+        params = {'as_of': as_of}
+        if limit is not None:
+            query += " LIMIT :limit"
+            params['limit'] = limit
+        with self.get_connection() as conn:
+            return typed_frame(pd.read_sql_query(query, conn, params=params))
+
+    # Incremental Refresh Methods
+    @cached_query
+    def get_delta(self, table, since_id=0, since_seq=0):
+        """Get rows of a change-tracked table added or changed since a sync position.
+
+        Returns a dict with `rows` (new and updated rows), `deleted` (ids to
+        drop) and the new `max_id` / `max_seq` position to pass next time.
+        Calling with the defaults returns the whole table, and so does a
+        position that change_log has been pruned past or that is more than
+        Config.DELTA_MAX_CHANGES changes behind; `full` is then True and
+        `rows` replaces what the caller holds.
+        """
+        if table not in migrations.CHANGE_TRACKED_TABLES:
+            raise ValueError(f"Table {table} is not change-tracked")
+
+        with self.get_connection() as conn:
+            # Read everything from one snapshot so no write can fall between
+            # the rows returned and the position recorded
+            conn.execute('BEGIN')
+            cursor = conn.cursor()
+            cursor.execute('SELECT COALESCE(MAX(seq), 0), MIN(seq) FROM change_log')
+            max_seq, oldest_seq = cursor.fetchone()
+            cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+            max_id = max(cursor.fetchone()[0], since_id)
+
+            full, deleted = not since_id, []
+            if not full:
+                cursor.execute(
+                    'SELECT COUNT(*) FROM change_log WHERE table_name = ? AND seq > ?',
+                    (table, since_seq)
+                )
+                pruned = oldest_seq is not None and since_seq < oldest_seq - 1
+                full = pruned or cursor.fetchone()[0] > Config.DELTA_MAX_CHANGES
+
+            if full:
+                query, params = f"SELECT * FROM {table}", []
+            else:
+                cursor.execute('''
+                    SELECT DISTINCT row_id FROM change_log
+                    WHERE table_name = ? AND seq > ? AND operation = 'D'
+                ''', (table, since_seq))
+                deleted = [row[0] for row in cursor.fetchall()]
+                # Updated rows are matched against change_log in SQL, so the
+                # query doesn't grow with the number of changes
+                query = f'''
+                    SELECT * FROM {table}
+                    WHERE id > ? OR id IN (
+                        SELECT row_id FROM change_log
+                        WHERE table_name = ? AND seq > ? AND operation = 'U'
+                    )
+                '''
+                params = [since_id, table, since_seq]
+            order = ', '.join(
+                f"{col} {'ASC' if ascending else 'DESC'}" for col, ascending in DELTA_ORDER[table]
+            )
+            rows = typed_frame(
+                pd.read_sql_query(f"{query} ORDER BY {order}", conn, params=params)
+            )
+            conn.commit()
+
+        return {
+            'table': table,
+            'rows': rows,
+            'deleted': deleted,
+            'full': full,
+            'max_id': max_id,
+            'max_seq': max_seq
+        }
+
+    # Paged Query Methods
+    def _fetch_page(self, columns, source, where, params, order, after=None, limit=None):
+        """Run a keyset-paginated `SELECT columns FROM source` query.
+
+        `order` is a list of (expression, ascending) pairs sharing one
+        direction and ending in a unique column. `after` is the cursor
+        returned with the previous page. Returns (DataFrame, next cursor),
+        where the cursor is None on the last page.
+        """
+        limit = limit or Config.PAGE_SIZE
+        ascending = order[0][1]
+        keys = [expr for expr, _ in order]
+        conditions = list(where)
+        params = list(params)
+        if after is not None:
+            placeholders = ', '.join('?' * len(keys))
+            conditions.append(f"({', '.join(keys)}) {'>' if ascending else '<'} ({placeholders})")
+            params.extend(after)
+
+        direction = 'ASC' if ascending else 'DESC'
+        key_columns = ', '.join(f"{expr} AS _key{i}" for i, expr in enumerate(keys))
+        query = f"SELECT {columns}, {key_columns} FROM {source}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY " + ", ".join(f"{expr} {direction}" for expr in keys)
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            names = [col[0] for col in cursor.description]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = tuple(rows[-1][-len(keys):])
+        page = typed_frame(pd.DataFrame(rows, columns=names).iloc[:, :-len(keys)])
+        return page, next_cursor
+
+    def _inventory_filters(self, search=None, categories=None):
+        where, params = [], []
+        matches, query = self._search_ids(search, 'inventory')
+        if matches:
+            where.append(f"inventory.id IN ({matches})")
+            params.append(query)
+        if categories:
+            where.append(f"inventory.category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        return where, params
+
+    @cached_query
+    def get_inventory_page(self, search=None, categories=None, sort='remaining', after=None, limit=None):
+        """Get one page of inventory batches with their item's sold and remaining stock"""
+        orders = {
+            'remaining': [('COALESCE(stock_levels.on_hand, 0)', False), ('inventory.id', False)],
+            'newest': [('inventory.id', False)],
+            'purchase_date': [('inventory.date_purchased', False), ('inventory.id', False)],
+        }
+        where, params = self._inventory_filters(search, categories)
+        columns = '''
+            inventory.*,
+            COALESCE(stock_levels.sold, 0) AS "Total Sold",
+            COALESCE(stock_levels.on_hand, 0) AS "Remaining Quantity"
+        '''
+        source = "inventory LEFT JOIN stock_levels ON stock_levels.item = inventory.item"
+        return self._fetch_page(columns, source, where, params, orders[sort], after, limit)
+
+    def _sales_filters(self, search=None, categories=None, payment_types=None):
+        where, params = [], []
+        # Sold products are inventory items, so match against the item index
+        matches, query = self._search_ids(search, 'inventory', column='item')
+        if matches:
+            where.append(f"product_id IN (SELECT item FROM inventory WHERE id IN ({matches}))")
+            params.append(query)
+        if categories:
+            where.append(f"category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        if payment_types:
+            where.append(f"payment_type IN ({', '.join('?' * len(payment_types))})")
+            params.extend(payment_types)
+        return where, params
+
+    @cached_query
+    def get_sales_page(self, search=None, categories=None, payment_types=None,
+                       sort='sale_date', after=None, limit=None):
+        """Get one page of sales matching the filters"""
+        orders = {
+            'sale_date': [('sale_date', False), ('id', False)],
+            'newest': [('id', False)],
+        }
+        where, params = self._sales_filters(search, categories, payment_types)
+        return self._fetch_page("*", "sales", where, params, orders[sort], after, limit)
+
+    @cached_query
+    def get_sales_totals(self, search=None, categories=None, payment_types=None):
+        """Get sale, received, pending and profit totals for the sales matching the filters"""
+        where, params = self._sales_filters(search, categories, payment_types)
+        query = '''
+            SELECT COALESCE(SUM(sale_price), 0),
+                   COALESCE(SUM(amount_received), 0),
+                   COALESCE(SUM(amount_pending), 0),
+                   COALESCE(SUM(profit_per_unit * quantity), 0)
+            FROM sales
+        '''
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        with self.get_connection() as conn:
+            row = conn.execute(query, params).fetchone()
+        return dict(zip(['sales', 'received', 'pending', 'profit'], row))
+
+    @cached_query
+    def get_credit_page(self, settled=None, search=None, date_from=None, date_to=None,
+                        due_before=None, after=None, limit=None):
+        """Get one page of credit entries, newest first.
+
+        `settled` selects paid entries (True), unpaid ones (False) or both
+        (None). `due_before` keeps entries due before that date, e.g. today
+        for overdue ones.
+        """
+        where, params = [], []
+        if settled is True:
+            where.append("status = 'Paid'")
+        elif settled is False:
+            where.append("status != 'Paid'")
+        matches, query = self._search_ids(search, 'credit_book')
+        if matches:
+            where.append(f"id IN ({matches})")
+            params.append(query)
+        if date_from:
+            where.append("date >= ?")
+            params.append(str(date_from))
+        if date_to:
+            where.append("date <= ?")
+            params.append(str(date_to))
+        if due_before:
+            where.append("due_date < ?")
+            params.append(str(due_before))
+        order = [('date', False), ('id', False)]
+        return self._fetch_page("*", "credit_book", where, params, order, after, limit)
+
+    @cached_query
+    def get_credit_date_range(self, settled=None):
+        """Get the earliest and latest credit dates as (min, max), or (None, None) if there are none"""
+        query = "SELECT MIN(date), MAX(date) FROM credit_book"
+        if settled is True:
+            query += " WHERE status = 'Paid'"
+        elif settled is False:
+            query += " WHERE status != 'Paid'"
+        with self.get_connection() as conn:
+            first, last = conn.execute(query).fetchone()
+        if first is None:
+            return None, None
+        return date.fromisoformat(first[:10]), date.fromisoformat(last[:10])
+
+    # Dashboard Methods
+    @cached_query
+    def get_dashboard_metrics(self):
+        """Get the Home and Analysis page KPIs in one round trip"""
+        with self.get_connection() as conn:
+            row = conn.execute('''
+                SELECT
+                    (SELECT COALESCE(SUM(total_purchase_price), 0) FROM inventory),
+                    (SELECT COALESCE(SUM(sale_price), 0) FROM sales),
+                    (SELECT COALESCE(SUM(amount_pending), 0) FROM sales),
+                    (SELECT COUNT(DISTINCT item) FROM inventory),
+                    (SELECT COALESCE(SUM(amount), 0) FROM credit_book)
+            ''').fetchone()
+        return dict(zip(
+            ['total_inventory_value', 'total_sales', 'total_pending', 'total_items', 'total_credit'],
+            row
+        ))
+
+    @cached_query
+    def get_stock_movement(self, search=None, categories=None, limit=None):
+        """Get bought, sold and remaining quantities for the `limit` inventory items matching the filters with the most stock on hand"""
+        conditions, params = [], []
+        matches, match_query = self._search_ids(search, 'inventory', column='item')
+        if matches:
+            conditions.append(f"id IN ({matches})")
+            params.append(match_query)
+        if categories:
+            conditions.append(f"category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        items = "SELECT item FROM inventory"
+        if conditions:
+            items += " WHERE " + " AND ".join(conditions)
+        query = f'''
+            SELECT item AS product_id,
+                   purchased AS quantity_bought,
+                   sold AS quantity_sold,
+                   on_hand AS quantity_remaining,
+                   category
+            FROM stock_levels
+            WHERE item IN ({items})
+            ORDER BY on_hand DESC
+        '''
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self.get_connection() as conn:
+            return typed_frame(pd.read_sql_query(query, conn, params=params))
+
+    @cached_query
+    def get_inventory_totals(self, search=None, categories=None):
+        """Get item count, investment and sold / remaining units for the inventory matching the filters.
+
+        Units are counted once per item from stock_levels, however many
+        purchases of the item match.
+        """
+        where, params = self._inventory_filters(search, categories)
+        matched = " WHERE " + " AND ".join(where) if where else ""
+        query = f'''
+            SELECT COUNT(*),
+                   (SELECT COALESCE(SUM(total_purchase_price + variable_expenses), 0)
+                    FROM inventory{matched}),
+                   COALESCE(SUM(on_hand), 0),
+                   COALESCE(SUM(sold), 0)
+            FROM stock_levels
+            WHERE item IN (SELECT item FROM inventory{matched})
+        '''
+        with self.get_connection() as conn:
+            row = conn.execute(query, params * 2).fetchone()
+        return dict(zip(['items', 'investment', 'remaining', 'sold'], row))
+
+    @cached_query
+    def get_low_stock_page(self, threshold, after=None, limit=None):
+        """Get one page of inventory items with at most `threshold` units on hand, lowest first"""
+        columns = '''
+            item, category, on_hand AS "Remaining Quantity",
+            (SELECT supplier FROM inventory WHERE inventory.item = stock_levels.item
+             ORDER BY id DESC LIMIT 1) AS supplier
+        '''
+        where = [
+            "on_hand <= ?",
+            "EXISTS (SELECT 1 FROM inventory WHERE inventory.item = stock_levels.item)",
+        ]
+        order = [('on_hand', True), ('item', True)]
+        return self._fetch_page(columns, "stock_levels", where, [threshold], order, after, limit)
+
+    # Stock Level Methods
+    @cached_query
+    def get_stock_levels(self):
+        """Get the materialized per-item stock levels"""
+        with self.get_connection() as conn:
+            return typed_frame(
+                pd.read_sql_query("SELECT * FROM stock_levels ORDER BY item", conn)
+            )
+
+    @cached_query
+    def get_stock_level(self, item):
+        """Get purchased, sold, on_hand and value for one item, or None if unknown"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Get total purchased
             cursor.execute('''
-                SELECT COALESCE(SUM(quantity_purchased), 0)
-                FROM inventory
+                SELECT item, category, purchased, sold, on_hand, cost_per_unit, value
+                FROM stock_levels
                 WHERE item = ?
             ''', (item,))
-            total_purchased = cursor.fetchone()[0]
-            
-            # Get total sold
-            cursor.execute('''
-                SELECT COALESCE(SUM(quantity), 0)
-                FROM sales
-                WHERE product_id = ?
-            ''', (item,))
-            total_sold = cursor.fetchone()[0]
-            
-            return total_purchased - total_sold 
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            columns = [col[0] for col in cursor.description]
+            return dict(zip(columns, row))
 
-    def save_document(self, file, reference_type, reference_id):
-        """Save a document to GitHub and record in database"""
-        try:
-            # Upload to GitHub
-            file_url = self.storage.upload_file(
-                file, 
-                reference_type, 
-                f"{reference_id}_{file.name}"
-            )
-            
-            # Save reference in database
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO documents (
-                        reference_type, reference_id, file_path, file_name
-                    ) VALUES (?, ?, ?, ?)
-                ''', (reference_type, reference_id, file_url, file.name))
-                conn.commit()
-            return True, "Document saved successfully"
-        except Exception as e:
-            return False, str(e)
+    def rebuild_stock_levels(self):
+        """Recompute stock_levels from inventory and sales.
+
+        Returns the items whose stored levels disagreed with the recomputed
+        ones, so an empty list means the triggers kept everything consistent.
+        """
+        mismatched = self._rebuild_rollup(
+            'stock_levels', 'item, purchased, sold, on_hand, ROUND(value, 2)',
+            migrations.STOCK_LEVELS_REBUILD_SQL
+        )
+        return sorted({row[0] for row in mismatched})
+
+    def _rebuild_rollup(self, table, columns, rebuild_sql):
+        """Repopulate a trigger-maintained table and return the rows that changed"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {columns} FROM {table}")
+            before = set(cursor.fetchall())
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(rebuild_sql)
+            cursor.execute(f"SELECT {columns} FROM {table}")
+            after = set(cursor.fetchall())
+            conn.commit()
+            return before ^ after
+
+    # Search Methods
+    @cached_query
+    def search(self, text, table='inventory', column=None, limit=50):
+        """Return ids of `table` rows matching `text`.
+
+        Searches the FTS5 index (inventory: item and supplier; credit_book:
+        customer, contact and description), matching each word as a
+        prefix. `column` restricts the match to one indexed column.
+
+        With a limit, returns the best `limit` matches by bm25 rank. Only
+        the newest SEARCH_RANK_CANDIDATES matches are ranked, since scoring
+        every row that contains a common word costs more than the lookup
+        itself. With limit=None, returns every match, newest first.
+        """
+        query = fts_query(text, column)
+        if query is None:
+            return []
+        fts_table = migrations.SEARCH_INDEXES[table][0]
+        if limit is None:
+            sql = f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ? ORDER BY rowid DESC"
+            params = [query]
+        else:
+            sql = f'''
+                SELECT rowid FROM (
+                    SELECT rowid, rank FROM {fts_table} WHERE {fts_table} MATCH ?
+                    ORDER BY rowid DESC LIMIT ?
+                )
+                ORDER BY rank LIMIT ?
+            '''
+            params = [query, max(limit, Config.SEARCH_RANK_CANDIDATES), limit]
+        with self.get_connection() as conn:
+            return [row[0] for row in conn.execute(sql, params)]
+
+    def _search_ids(self, text, table, column=None):
+        """Subquery selecting the ids of full-text matches and its parameter, or (None, None)"""
+        query = fts_query(text, column)
+        if query is None:
+            return None, None
+        fts_table = migrations.SEARCH_INDEXES[table][0]
+        return f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?", query
 
+    # Daily Sales Summary Methods
+    @cached_query
+    def get_daily_sales(self, date_from=None, date_to=None, categories=None):
+        """Get sales, units, revenue, cost, profit and pending per day from the rollup"""
+        where, params = self._summary_filters(date_from, date_to, categories)
+        query = '''
+            SELECT date, SUM(sales) AS sales, SUM(units) AS units,
+                   SUM(revenue) AS revenue, SUM(cost) AS cost,
+                   SUM(profit) AS profit, SUM(pending) AS pending
+            FROM daily_sales_summary
+        '''
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " GROUP BY date ORDER BY date"
+        with self.get_connection() as conn:
+            return typed_frame(pd.read_sql_query(query, conn, params=params))
+
+    @cached_query
+    def get_sales_by_category(self, date_from=None, date_to=None):
+        """Get units, revenue, profit and pending per category from the rollup"""
+        where, params = self._summary_filters(date_from, date_to)
+        query = '''
+            SELECT category, SUM(units) AS units, SUM(revenue) AS revenue,
+                   SUM(profit) AS profit, SUM(pending) AS pending
+            FROM daily_sales_summary
+        '''
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " GROUP BY category ORDER BY revenue DESC"
+        with self.get_connection() as conn:
+            return typed_frame(pd.read_sql_query(query, conn, params=params))
+
+    def _summary_filters(self, date_from=None, date_to=None, categories=None):
+        where, params = [], []
+        if date_from is not None:
+            where.append("date >= ?")
+            params.append(str(date_from))
+        if date_to is not None:
+            where.append("date <= ?")
+            params.append(str(date_to))
+        if categories:
+            where.append(f"category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        return where, params
+
+    def rebuild_daily_sales_summary(self):
+        """Recompute daily_sales_summary from sales.
+
+        Returns the (date, category, payment_type) keys whose stored totals
+        disagreed with the recomputed ones.
+        """
+        mismatched = self._rebuild_rollup(
+            'daily_sales_summary',
+            'date, category, payment_type, sales, units, ROUND(revenue, 2), '
+            'ROUND(cost, 2), ROUND(profit, 2), ROUND(pending, 2)',
+            migrations.DAILY_SALES_REBUILD_SQL
+        )
+        return sorted({row[:3] for row in mismatched})
+
+    # Utility Methods
+    def calculate_total_quantity(self, item):
+        """Calculate current quantity for an item"""
+        level = self.get_stock_level(item)
+        return level['on_hand'] if level else 0
+
+    def _remove_unused_file(self, file_path):
+        """Delete a stored file unless a document still references it.
+
+        Files are content-addressed, so another document with the same
+        bytes shares the path. The check and the removal run under the
+        write lock, which the upload worker also holds while it moves a
+        file into place and records it, so a file being reused can't be
+        removed in between.
+        """
+        with self.get_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            in_use = conn.execute(
+                "SELECT 1 FROM documents WHERE file_path = ? LIMIT 1", (file_path,)
+            ).fetchone()
+            if in_use is None:
+                self.storage.delete(file_path)
+                self.thumbnails.discard(file_path)
+
+    @cached_query
     def get_documents(self, reference_type, reference_id):
         """Get documents for a reference"""
         with self.get_connection() as conn:
@@ -227,7 +964,7 @@ class Database:
                 conn, 
                 params=(reference_type, reference_id)
             )
-            return df
+            return typed_frame(df)
 
     def delete_document(self, document_id):
         """Delete document and its file"""
@@ -237,18 +974,19 @@ class Database:
                 # Get file path before deletion
                 cursor.execute("SELECT file_path FROM documents WHERE id = ?", (document_id,))
                 result = cursor.fetchone()
-                
-                if result:
-                    file_path = result[0]
-                    # Delete file
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                    
-                    # Delete database record
-                    cursor.execute("DELETE FROM documents WHERE id = ?", (document_id,))
-                    conn.commit()
-                    return True
-                return False
+                if not result:
+                    return False
+
+                # Delete database record, and stop any upload still in flight
+                cursor.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+                cursor.execute('''
+                    UPDATE upload_jobs SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+                    WHERE document_id = ? AND status IN ('pending', 'running')
+                ''', (document_id,))
+
+            # Only once the delete is committed can the file go
+            self._remove_unused_file(result[0])
+            return True
         except Exception as e:
             print(f"Error deleting document: {e}")
             return False 
@@ -0,0 +1,133 @@
+"""Shared HTTP client for remote documents.
+
+One pooled requests.Session per process, with default timeouts and
+retries with backoff. fetch() keeps downloaded files in an on-disk cache
+and revalidates them with ETag / Last-Modified, so a document that
+hasn't changed is served from disk.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import Config
+
+CHUNK_SIZE = 64 * 1024
+
+class HttpClient:
+    def __init__(self, cache_dir=None, timeout=None, retries=None, pool_size=None,
+                 fresh_seconds=None):
+        self.cache_dir = Path(cache_dir or Config.HTTP_CACHE_DIR)
+        self.timeout = timeout or Config.HTTP_TIMEOUT
+        self.fresh_seconds = (
+            fresh_seconds if fresh_seconds is not None else Config.HTTP_CACHE_FRESH_SECONDS
+        )
+        # Connection failures are retried for any method; status-based
+        # retries only apply to idempotent methods, so a POST that reached
+        # the server is never sent twice
+        retry = Retry(
+            total=retries if retries is not None else Config.HTTP_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size or Config.HTTP_POOL_SIZE,
+            pool_maxsize=pool_size or Config.HTTP_POOL_SIZE,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def _cache_paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f"{key}.body", self.cache_dir / f"{key}.json"
+
+    def fetch(self, url):
+        """Return the path of a local copy of `url`, downloading only when it changed.
+
+        A copy younger than fresh_seconds is used as is. Older copies are
+        revalidated with a conditional GET, and if the server can't be
+        reached the stale copy is returned rather than failing.
+        """
+        body_path, meta_path = self._cache_paths(url)
+        meta = {}
+        if body_path.exists() and meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text())
+            except ValueError:
+                meta = {}
+        if meta and time.time() - meta.get('checked_at', 0) < self.fresh_seconds:
+            return str(body_path)
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response = self.get(url, headers=headers, stream=True)
+        except requests.RequestException:
+            if meta:
+                return str(body_path)
+            raise
+
+        with response:
+            if response.status_code == 304 and meta:
+                meta['checked_at'] = time.time()
+                self._write_meta(meta_path, meta)
+                return str(body_path)
+            response.raise_for_status()
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp = body_path.with_name(f".download-{uuid.uuid4().hex}")
+            try:
+                with open(temp, 'wb') as out:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        out.write(chunk)
+                os.replace(temp, body_path)
+            finally:
+                temp.unlink(missing_ok=True)
+
+            self._write_meta(meta_path, {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_type': response.headers.get('Content-Type'),
+                'checked_at': time.time(),
+            })
+        return str(body_path)
+
+    def _write_meta(self, meta_path, meta):
+        temp = meta_path.with_name(f".meta-{uuid.uuid4().hex}")
+        temp.write_text(json.dumps(meta))
+        os.replace(temp, meta_path)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide HttpClient shared by every session"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
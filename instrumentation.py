@@ -0,0 +1,293 @@
+"""Call counts, latency histograms and a slow-query log for database access.
+
+Two levels are measured. Every public Database method is timed as a
+whole (instrument_methods), and every SQL statement run on a pooled
+connection is timed from execute() until its last row is fetched
+(InstrumentedConnection). Statements slower than Config.SLOW_QUERY_MS
+have their EXPLAIN QUERY PLAN captured when the connection goes back to
+the pool, and slow calls and errors are written as JSON lines to a
+rotating log file.
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+import pandas as pd
+
+from config import Config
+from tracing import traced
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+# Statements EXPLAIN QUERY PLAN can describe
+_EXPLAINABLE = re.compile(r'\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+# A run of placeholders, as generated for IN (...) lists of any length
+_PLACEHOLDER_RUN = re.compile(r'\?(\s*,\s*\?)+')
+
+def statement_key(sql):
+    """Collapse whitespace and placeholder lists so one statement is one entry"""
+    return _PLACEHOLDER_RUN.sub('?, ...', ' '.join(sql.split()))
+
+def percentile(counts, q):
+    """Upper bucket bound (ms) below which a fraction q of the calls fell"""
+    total = sum(counts)
+    if not total:
+        return None
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, counts):
+        seen += count
+        if seen >= q * total:
+            return bound
+    return LATENCY_BUCKETS_MS[-1]
+
+def _row_count(value):
+    if isinstance(value, (pd.DataFrame, list)):
+        return len(value)
+    if isinstance(value, dict) and isinstance(value.get('rows'), pd.DataFrame):
+        return len(value['rows'])
+    return None
+
+class _Timing:
+    __slots__ = ('calls', 'errors', 'seconds', 'max_seconds', 'rows', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+class QueryStats:
+    """Thread-safe latency and row counts per Database method and SQL statement"""
+
+    def __init__(self, recent_size=100):
+        self._timings = {}  # (kind, name) -> _Timing
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=recent_size)  # newest slow calls and errors
+        self._logger = None
+
+    def record(self, kind, name, seconds, rows=None, error=None):
+        with self._lock:
+            timing = self._timings.get((kind, name))
+            if timing is None:
+                timing = self._timings[(kind, name)] = _Timing()
+            timing.calls += 1
+            timing.seconds += seconds
+            timing.max_seconds = max(timing.max_seconds, seconds)
+            timing.buckets[bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+            if rows:
+                timing.rows += rows
+            if error is not None:
+                timing.errors += 1
+        if error is not None:
+            self.log('error', kind=kind, name=name, ms=round(seconds * 1000, 2), error=repr(error))
+        elif kind == 'method' and seconds * 1000 >= Config.SLOW_QUERY_MS:
+            self.log('slow', kind=kind, name=name, ms=round(seconds * 1000, 2), rows=rows)
+
+    def log(self, event, **fields):
+        """Keep an event for the Settings page and append it to the query log"""
+        entry = {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'event': event, **fields}
+        self.recent.append(entry)
+        try:
+            logger = self._get_logger()
+            logger.log(logging.ERROR if event == 'error' else logging.WARNING,
+                       json.dumps(entry, default=str))
+        except OSError:
+            pass  # an unwritable log directory shouldn't break queries
+
+    def _get_logger(self):
+        if self._logger is None:
+            path = Path(Config.QUERY_LOG_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                path, maxBytes=Config.QUERY_LOG_MAX_BYTES,
+                backupCount=Config.QUERY_LOG_BACKUPS, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('mgs.queries')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def snapshot(self, kind):
+        """One row per method or statement of `kind`, slowest in total first"""
+        with self._lock:
+            items = [(name, timing) for (k, name), timing in self._timings.items() if k == kind]
+            rows = [{
+                'name': name,
+                'calls': timing.calls,
+                'errors': timing.errors,
+                'total_ms': timing.seconds * 1000,
+                'mean_ms': timing.seconds * 1000 / timing.calls,
+                'p50_ms': percentile(timing.buckets, 0.5),
+                'p95_ms': percentile(timing.buckets, 0.95),
+                'max_ms': timing.max_seconds * 1000,
+                'rows': timing.rows,
+                'histogram': list(timing.buckets),
+            } for name, timing in items]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+        self.recent.clear()
+
+QUERY_STATS = QueryStats()
+
+def timed(name, kind='method'):
+    """Decorator recording each call of a function under `name`"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not Config.QUERY_STATS_ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                QUERY_STATS.record(kind, name, time.perf_counter() - start, error=e)
+                raise
+            QUERY_STATS.record(kind, name, time.perf_counter() - start, _row_count(result))
+            return result
+        return wrapper
+    return decorate
+
+def instrument_methods(exclude=()):
+    """Class decorator timing every public method defined on the class.
+
+    Calls made during a traced rerun also appear as 'db' spans.
+    """
+    def decorate(cls):
+        for name, attr in list(vars(cls).items()):
+            if not name.startswith('_') and name not in exclude and callable(attr):
+                setattr(cls, name, timed(name)(traced('db', name)(attr)))
+        return cls
+    return decorate
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times each statement, including fetching its rows"""
+
+    _statement = None  # [sql, parameters, seconds, rows] of the running statement
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except Exception as e:
+            QUERY_STATS.record('statement', statement_key(sql), time.perf_counter() - start, error=e)
+            raise
+        self._statement = [sql, parameters, time.perf_counter() - start, max(self.rowcount, 0)]
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        # Only a list can be reused to explain the statement afterwards
+        first = seq_of_parameters[0] if isinstance(seq_of_parameters, list) and seq_of_parameters else None
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        except Exception as e:
+            QUERY_STATS.record('statement', statement_key(sql), time.perf_counter() - start, error=e)
+            raise
+        self._statement = [sql, first, time.perf_counter() - start, max(self.rowcount, 0)]
+        return self
+
+    def _fetched(self, start, rows, done):
+        statement = self._statement
+        if statement is not None:
+            statement[2] += time.perf_counter() - start
+            statement[3] += rows
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is None:
+            return
+        sql, parameters, seconds, rows = statement
+        QUERY_STATS.record('statement', statement_key(sql), seconds, rows)
+        if seconds * 1000 >= Config.SLOW_QUERY_MS and _EXPLAINABLE.match(sql):
+            self.connection.slow_statements.append((sql, parameters, seconds, rows))
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors are InstrumentedCursors"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slow_statements = []
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def log_slow_statements(self):
+        """Write the statements found slow since the last call, with their query plans.
+
+        Called when the connection is returned to the pool, so explaining
+        them doesn't add to the time of the query itself.
+        """
+        slow, self.slow_statements = self.slow_statements, []
+        for sql, parameters, seconds, rows in slow:
+            try:
+                plan = [row[3] for row in sqlite3.Connection.execute(
+                    self, f'EXPLAIN QUERY PLAN {sql}', parameters or ()
+                )]
+            except sqlite3.Error as e:
+                plan = [f'unavailable: {e}']
+            QUERY_STATS.log(
+                'slow', kind='statement', name=statement_key(sql), ms=round(seconds * 1000, 2),
+                rows=rows, params=repr(parameters)[:200], plan=plan
+            )
@@ -0,0 +1,545 @@
+"""Versioned schema migrations for the inventory database.
+
+Each migration is a (version, description, function) entry in MIGRATIONS.
+Functions receive a cursor inside an open transaction and must be safe to
+re-run against a database that already has their changes (for example one
+created before schema_version existed).
+"""
+import sqlite3
+
+def _create_base_tables(cursor):
+    """Create the core tables if they don't exist"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inventory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item TEXT NOT NULL,
+            category TEXT NOT NULL,
+            quantity_purchased INTEGER NOT NULL,
+            date_purchased DATE NOT NULL,
+            total_purchase_price REAL NOT NULL,
+            variable_expenses REAL NOT NULL,
+            cost_per_unit REAL NOT NULL,
+            supplier TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id TEXT NOT NULL,
+            category TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            sale_date DATE NOT NULL,
+            sale_price REAL NOT NULL,
+            price_per_unit REAL NOT NULL,
+            cost_per_unit REAL NOT NULL,
+            profit_per_unit REAL NOT NULL,
+            payment_type TEXT NOT NULL,
+            amount_received REAL NOT NULL,
+            amount_pending REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reference_type TEXT NOT NULL,
+            reference_id INTEGER NOT NULL,
+            file_path TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS credit_book (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer TEXT NOT NULL,
+            amount REAL NOT NULL,
+            date DATE NOT NULL,
+            due_date DATE NOT NULL,
+            description TEXT,
+            contact TEXT,
+            status TEXT DEFAULT 'Pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _add_credit_contact(cursor):
+    """Add credit_book.contact to tables created with the older contact_number column"""
+    columns = _table_columns(cursor, 'credit_book')
+    if 'contact' not in columns:
+        cursor.execute('ALTER TABLE credit_book ADD COLUMN contact TEXT')
+        if 'contact_number' in columns:
+            cursor.execute('UPDATE credit_book SET contact = contact_number')
+
+# Secondary indexes for hot lookups as (name, table, columns). Where the
+# column list includes the summed value the index covers the whole query.
+INDEXES = [
+    ('idx_inventory_item', 'inventory', ('item', 'quantity_purchased')),
+    ('idx_sales_product', 'sales', ('product_id', 'quantity')),
+    ('idx_sales_sale_date', 'sales', ('sale_date',)),
+    ('idx_documents_reference', 'documents', ('reference_type', 'reference_id')),
+    ('idx_credit_book_date', 'credit_book', ('date',)),
+    ('idx_credit_book_status_date', 'credit_book', ('status', 'date')),
+]
+
+# Outstanding credits by due date. customer and amount are included so the
+# aging queries are answered from the index alone.
+CREDIT_AGING_INDEX = (
+    'idx_credit_book_status_due', 'credit_book', ('status', 'due_date', 'customer', 'amount')
+)
+
+def _create_credit_aging_index(cursor):
+    """Index outstanding credits by due date for the aging reports"""
+    _create_indexes(cursor, [CREDIT_AGING_INDEX])
+
+def _create_indexes(cursor, indexes=INDEXES):
+    """Create each index that doesn't exist yet, then refresh planner statistics.
+
+    Only the indexed tables are analyzed. A database-wide ANALYZE on a new,
+    nearly empty database also records the FTS shadow tables as a couple
+    of rows, and FTS5's own lookups then slow down as the index grows.
+    """
+    for name, table, columns in indexes:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'
+        )
+    for table in dict.fromkeys(table for _, table, _ in indexes):
+        cursor.execute(f'ANALYZE {table}')
+
+# Recomputes stock_levels from the source tables. value uses the cost per
+# unit of the most recent purchase, the same cost the Sales page charges.
+STOCK_LEVELS_REBUILD_SQL = '''
+    INSERT INTO stock_levels (item, category, purchased, sold, on_hand, cost_per_unit, value)
+    WITH purchased AS (
+        SELECT item, SUM(quantity_purchased) AS purchased, MAX(id) AS last_id
+        FROM inventory
+        GROUP BY item
+    ),
+    sold AS (
+        SELECT product_id AS item, SUM(quantity) AS sold, MIN(category) AS category
+        FROM sales
+        GROUP BY product_id
+    ),
+    items AS (
+        SELECT item FROM purchased
+        UNION
+        SELECT item FROM sold
+    )
+    SELECT
+        items.item,
+        COALESCE(latest.category, sold.category),
+        COALESCE(purchased.purchased, 0),
+        COALESCE(sold.sold, 0),
+        COALESCE(purchased.purchased, 0) - COALESCE(sold.sold, 0),
+        COALESCE(latest.cost_per_unit, 0),
+        (COALESCE(purchased.purchased, 0) - COALESCE(sold.sold, 0))
+            * COALESCE(latest.cost_per_unit, 0)
+    FROM items
+    LEFT JOIN purchased ON purchased.item = items.item
+    LEFT JOIN inventory AS latest ON latest.id = purchased.last_id
+    LEFT JOIN sold ON sold.item = items.item
+'''
+
+# Each trigger body first makes sure the item has a row, then applies the
+# delta. SET expressions see the old column values, so on_hand and value
+# are written out in terms of them.
+_STOCK_TRIGGERS = {
+    'trg_inventory_stock_insert': '''
+        AFTER INSERT ON inventory BEGIN
+            INSERT OR IGNORE INTO stock_levels (item, category)
+            VALUES (NEW.item, NEW.category);
+            UPDATE stock_levels SET
+                category = NEW.category,
+                purchased = purchased + NEW.quantity_purchased,
+                on_hand = on_hand + NEW.quantity_purchased,
+                cost_per_unit = NEW.cost_per_unit,
+                value = (on_hand + NEW.quantity_purchased) * NEW.cost_per_unit
+            WHERE item = NEW.item;
+        END
+    ''',
+    'trg_inventory_stock_delete': '''
+        AFTER DELETE ON inventory BEGIN
+            UPDATE stock_levels SET
+                purchased = purchased - OLD.quantity_purchased,
+                on_hand = on_hand - OLD.quantity_purchased,
+                cost_per_unit = COALESCE((
+                    SELECT cost_per_unit FROM inventory
+                    WHERE item = OLD.item ORDER BY id DESC LIMIT 1
+                ), 0),
+                value = (on_hand - OLD.quantity_purchased) * COALESCE((
+                    SELECT cost_per_unit FROM inventory
+                    WHERE item = OLD.item ORDER BY id DESC LIMIT 1
+                ), 0)
+            WHERE item = OLD.item;
+        END
+    ''',
+    'trg_inventory_stock_update': '''
+        AFTER UPDATE OF item, category, quantity_purchased, cost_per_unit ON inventory BEGIN
+            UPDATE stock_levels SET
+                purchased = purchased - OLD.quantity_purchased,
+                on_hand = on_hand - OLD.quantity_purchased
+            WHERE item = OLD.item;
+            INSERT OR IGNORE INTO stock_levels (item, category)
+            VALUES (NEW.item, NEW.category);
+            UPDATE stock_levels SET
+                purchased = purchased + NEW.quantity_purchased,
+                on_hand = on_hand + NEW.quantity_purchased
+            WHERE item = NEW.item;
+            UPDATE stock_levels SET
+                cost_per_unit = COALESCE((
+                    SELECT cost_per_unit FROM inventory
+                    WHERE item = stock_levels.item ORDER BY id DESC LIMIT 1
+                ), 0),
+                category = COALESCE((
+                    SELECT category FROM inventory
+                    WHERE item = stock_levels.item ORDER BY id DESC LIMIT 1
+                ), category)
+            WHERE item IN (OLD.item, NEW.item);
+            UPDATE stock_levels SET value = on_hand * cost_per_unit
+            WHERE item IN (OLD.item, NEW.item);
+        END
+    ''',
+    'trg_sales_stock_insert': '''
+        AFTER INSERT ON sales BEGIN
+            INSERT OR IGNORE INTO stock_levels (item, category)
+            VALUES (NEW.product_id, NEW.category);
+            UPDATE stock_levels SET
+                sold = sold + NEW.quantity,
+                on_hand = on_hand - NEW.quantity,
+                value = (on_hand - NEW.quantity) * cost_per_unit
+            WHERE item = NEW.product_id;
+        END
+    ''',
+    'trg_sales_stock_delete': '''
+        AFTER DELETE ON sales BEGIN
+            UPDATE stock_levels SET
+                sold = sold - OLD.quantity,
+                on_hand = on_hand + OLD.quantity,
+                value = (on_hand + OLD.quantity) * cost_per_unit
+            WHERE item = OLD.product_id;
+        END
+    ''',
+    'trg_sales_stock_update': '''
+        AFTER UPDATE OF product_id, quantity ON sales BEGIN
+            UPDATE stock_levels SET
+                sold = sold - OLD.quantity,
+                on_hand = on_hand + OLD.quantity,
+                value = (on_hand + OLD.quantity) * cost_per_unit
+            WHERE item = OLD.product_id;
+            INSERT OR IGNORE INTO stock_levels (item, category)
+            VALUES (NEW.product_id, NEW.category);
+            UPDATE stock_levels SET
+                sold = sold + NEW.quantity,
+                on_hand = on_hand - NEW.quantity,
+                value = (on_hand - NEW.quantity) * cost_per_unit
+            WHERE item = NEW.product_id;
+        END
+    ''',
+}
+
+def _create_stock_levels(cursor):
+    """Create the trigger-maintained stock_levels table and populate it"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_levels (
+            item TEXT PRIMARY KEY,
+            category TEXT,
+            purchased INTEGER NOT NULL DEFAULT 0,
+            sold INTEGER NOT NULL DEFAULT 0,
+            on_hand INTEGER NOT NULL DEFAULT 0,
+            cost_per_unit REAL NOT NULL DEFAULT 0,
+            value REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    for name, body in _STOCK_TRIGGERS.items():
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+    cursor.execute('DELETE FROM stock_levels')
+    cursor.execute(STOCK_LEVELS_REBUILD_SQL)
+
+# Tables whose session copies are refreshed incrementally. Inserts are found
+# by id high-water mark; updates and deletes are recorded in change_log.
+CHANGE_TRACKED_TABLES = ('inventory', 'sales', 'credit_book')
+
+def _create_change_log(cursor):
+    """Record updates and deletes so readers can fetch only what changed"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL
+        )
+    ''')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_change_log_table_seq ON change_log (table_name, seq)'
+    )
+    for table in CHANGE_TRACKED_TABLES:
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_log_update
+            AFTER UPDATE ON {table} BEGIN
+                INSERT INTO change_log (table_name, row_id, operation)
+                VALUES ('{table}', NEW.id, 'U');
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_log_delete
+            AFTER DELETE ON {table} BEGIN
+                INSERT INTO change_log (table_name, row_id, operation)
+                VALUES ('{table}', OLD.id, 'D');
+            END
+        ''')
+
+# change_log keeps the newest CHANGE_LOG_KEEP entries. Older ones are
+# deleted in one batch every CHANGE_LOG_PRUNE_EVERY inserts; get_delta()
+# reloads the whole table for a reader whose position has been pruned.
+CHANGE_LOG_KEEP = 10000
+CHANGE_LOG_PRUNE_EVERY = 1000
+
+def _prune_change_log(cursor):
+    """Bound change_log by deleting entries older than the newest CHANGE_LOG_KEEP"""
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_prune
+        AFTER INSERT ON change_log
+        WHEN NEW.seq % {CHANGE_LOG_PRUNE_EVERY} = 0 BEGIN
+            DELETE FROM change_log WHERE seq <= NEW.seq - {CHANGE_LOG_KEEP};
+        END
+    ''')
+    cursor.execute(
+        'DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?',
+        (CHANGE_LOG_KEEP,)
+    )
+
+def _add_document_hashes(cursor):
+    """Record content hash and size of stored documents"""
+    columns = _table_columns(cursor, 'documents')
+    if 'sha256' not in columns:
+        cursor.execute('ALTER TABLE documents ADD COLUMN sha256 TEXT')
+    if 'size' not in columns:
+        cursor.execute('ALTER TABLE documents ADD COLUMN size INTEGER')
+    _create_indexes(cursor, [
+        ('idx_documents_sha256', 'documents', ('sha256',)),
+        ('idx_documents_file_path', 'documents', ('file_path',)),
+    ])
+
+def _create_upload_jobs(cursor):
+    """Track document upload status and the persistent background upload queue"""
+    columns = _table_columns(cursor, 'documents')
+    if 'status' not in columns:
+        # Documents stored before the queue existed are already in place
+        cursor.execute("ALTER TABLE documents ADD COLUMN status TEXT NOT NULL DEFAULT 'stored'")
+    if 'error' not in columns:
+        cursor.execute('ALTER TABLE documents ADD COLUMN error TEXT')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            document_id INTEGER NOT NULL,
+            staged_path TEXT NOT NULL,
+            reference_type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    _create_indexes(cursor, [
+        ('idx_upload_jobs_status', 'upload_jobs', ('status',)),
+        ('idx_documents_status', 'documents', ('status',)),
+    ])
+
+DAILY_SALES_REBUILD_SQL = '''
+    INSERT INTO daily_sales_summary (
+        date, category, payment_type, sales, units, revenue, cost, profit, pending
+    )
+    SELECT
+        COALESCE(DATE(sale_date), sale_date), category, payment_type,
+        COUNT(*),
+        SUM(quantity),
+        SUM(sale_price),
+        SUM(cost_per_unit * quantity),
+        SUM(profit_per_unit * quantity),
+        SUM(amount_pending)
+    FROM sales
+    GROUP BY 1, 2, 3
+'''
+
+# Add or subtract one sale's contribution to its day / category / payment
+# type row. `sign` is '+' or '-', `row` is NEW or OLD.
+def _daily_sales_delta(row, sign):
+    key = f'''
+        date = COALESCE(DATE({row}.sale_date), {row}.sale_date)
+        AND category = {row}.category AND payment_type = {row}.payment_type
+    '''
+    statements = []
+    if sign == '+':
+        statements.append(f'''
+            INSERT OR IGNORE INTO daily_sales_summary (date, category, payment_type)
+            VALUES (COALESCE(DATE({row}.sale_date), {row}.sale_date),
+                    {row}.category, {row}.payment_type);
+        ''')
+    statements.append(f'''
+        UPDATE daily_sales_summary SET
+            sales = sales {sign} 1,
+            units = units {sign} {row}.quantity,
+            revenue = revenue {sign} {row}.sale_price,
+            cost = cost {sign} {row}.cost_per_unit * {row}.quantity,
+            profit = profit {sign} {row}.profit_per_unit * {row}.quantity,
+            pending = pending {sign} {row}.amount_pending
+        WHERE {key};
+    ''')
+    if sign == '-':
+        # Drop days that no longer have any sales
+        statements.append(f'DELETE FROM daily_sales_summary WHERE sales = 0 AND {key};')
+    return ''.join(statements)
+
+_DAILY_SALES_TRIGGERS = {
+    'trg_sales_daily_insert': f'''
+        AFTER INSERT ON sales BEGIN
+            {_daily_sales_delta('NEW', '+')}
+        END
+    ''',
+    'trg_sales_daily_delete': f'''
+        AFTER DELETE ON sales BEGIN
+            {_daily_sales_delta('OLD', '-')}
+        END
+    ''',
+    'trg_sales_daily_update': f'''
+        AFTER UPDATE OF sale_date, category, payment_type, quantity, sale_price,
+                        cost_per_unit, profit_per_unit, amount_pending ON sales BEGIN
+            {_daily_sales_delta('OLD', '-')}
+            {_daily_sales_delta('NEW', '+')}
+        END
+    ''',
+}
+
+def _create_daily_sales_summary(cursor):
+    """Create the trigger-maintained daily_sales_summary rollup and populate it"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_sales_summary (
+            date DATE NOT NULL,
+            category TEXT NOT NULL,
+            payment_type TEXT NOT NULL,
+            sales INTEGER NOT NULL DEFAULT 0,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            cost REAL NOT NULL DEFAULT 0,
+            profit REAL NOT NULL DEFAULT 0,
+            pending REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, category, payment_type)
+        ) WITHOUT ROWID
+    ''')
+    for name, body in _DAILY_SALES_TRIGGERS.items():
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+    cursor.execute('DELETE FROM daily_sales_summary')
+    cursor.execute(DAILY_SALES_REBUILD_SQL)
+
+# Full-text indexes: source table -> (FTS5 table, indexed columns). The
+# FTS tables are external-content, so they store only the index and read
+# text back from the source table; rowid is the source row's id.
+SEARCH_INDEXES = {
+    'inventory': ('inventory_fts', ('item', 'supplier')),
+    'credit_book': ('credit_book_fts', ('customer', 'contact', 'description')),
+}
+
+def _create_search_indexes(cursor):
+    """Create trigger-synced FTS5 indexes over item, supplier and credit text"""
+    for table, (fts_table, columns) in SEARCH_INDEXES.items():
+        cols = ', '.join(columns)
+        new_values = ', '.join(f'NEW.{col}' for col in columns)
+        old_values = ', '.join(f'OLD.{col}' for col in columns)
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {cols}, content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert
+            AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table} (rowid, {cols}) VALUES (NEW.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete
+            AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {cols})
+                VALUES ('delete', OLD.id, {old_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update
+            AFTER UPDATE OF {cols} ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {cols})
+                VALUES ('delete', OLD.id, {old_values});
+                INSERT INTO {fts_table} (rowid, {cols}) VALUES (NEW.id, {new_values});
+            END
+        ''')
+        cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+def _table_columns(cursor, table):
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1] for row in cursor.fetchall()}
+
+MIGRATIONS = [
+    (1, "Create inventory, sales, documents and credit_book tables", _create_base_tables),
+    (2, "Add contact column to legacy credit_book tables", _add_credit_contact),
+    (3, "Add secondary and covering indexes for hot lookups", _create_indexes),
+    (4, "Add trigger-maintained stock_levels table", _create_stock_levels),
+    (5, "Add change_log for incremental table refreshes", _create_change_log),
+    (6, "Add content hash and size to documents", _add_document_hashes),
+    (7, "Add upload status to documents and the upload_jobs queue", _create_upload_jobs),
+    (8, "Add trigger-maintained daily_sales_summary rollup", _create_daily_sales_summary),
+    (9, "Add FTS5 search indexes for inventory and credit_book", _create_search_indexes),
+    (10, "Add credit aging index on status and due date", _create_credit_aging_index),
+    (11, "Prune change_log to its newest entries", _prune_change_log),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    """Return the applied schema version, or 0 for an unversioned database"""
+    try:
+        version = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    return version or 0
+
+def migrate(conn):
+    """Apply pending migrations in order and return the versions applied.
+
+    When the schema is already current this costs a single query.
+    """
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    applied = []
+    # BEGIN IMMEDIATE takes the write lock up front so two processes
+    # starting together can't both apply the same migration
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        current = get_schema_version(conn)
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            step(cursor)
+            cursor.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (version, description)
+            )
+            applied.append(version)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
@@ -0,0 +1,125 @@
+"""Process-wide cache of Database read results shared by every session.
+
+Entries are tagged with the database's data version when they were read
+and are discarded as soon as any connection commits a write, so a hit is
+never stale. Cached DataFrames are shared between sessions and must be
+treated as read-only.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
+import pandas as pd
+from config import Config
+
+def _plain(value):
+    """Convert numpy scalars in argument values to Python ones.
+
+    sqlite3 binds numpy integers as BLOBs, which never match an INTEGER
+    column, yet they hash and compare equal to the Python value, so a
+    caller passing one would cache a wrong result under the right key.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return type(value)(_plain(v) for v in value)
+    return value
+
+def _freeze(value):
+    """Turn argument values into something hashable for use in a cache key"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+def estimate_size(value):
+    """Approximate number of bytes held by a cached value"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+class QueryCache:
+    """LRU cache bounded by the estimated memory of its entries"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (version, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """Return (True, value) for a current entry, otherwise (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def put(self, key, version, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (version, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+QUERY_CACHE = QueryCache(Config.QUERY_CACHE_MAX_BYTES)
+
+def cached_query(method):
+    """Serve a Database read method from QUERY_CACHE, keyed by its arguments"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        args, kwargs = _plain(args), _plain(kwargs)
+        if not Config.QUERY_CACHE_ENABLED:
+            return method(self, *args, **kwargs)
+        key = (self.pool.key, method.__name__, _freeze(args), _freeze(kwargs))
+        # Read the version before querying: a write landing mid-query then
+        # leaves the entry tagged with the older version, never the newer one
+        version = self.pool.data_version()
+        hit, value = QUERY_CACHE.get(key, version)
+        if hit:
+            return value
+        value = method(self, *args, **kwargs)
+        QUERY_CACHE.put(key, version, value)
+        return value
+    return wrapper
@@ -0,0 +1,165 @@
+"""Process-wide, versioned snapshots of the change-tracked tables.
+
+Sessions used to load inventory, sales and credit_book into their own
+session state and apply deltas to them separately, so every session held
+a full copy of every table. SNAPSHOTS keeps one current snapshot of each
+table, shared by all sessions. When the data changes it is brought up to
+date once, with Database.get_delta() and apply_delta(), and becomes a new
+version; sessions then switch to it on their next rerun.
+
+Sessions hold shallow copies of a snapshot's frame. The app switches on
+pandas copy-on-write mode at startup, so those copies share the
+snapshot's columns until a session modifies one, and only that column is
+then copied into the session. Code outside the app that hands out copies
+should do so under pd.option_context('mode.copy_on_write', True).
+Snapshot frames themselves must be treated as read-only.
+
+memory() reports the bytes held by the shared snapshots and, for each
+session, the bytes its DataFrames hold outside them.
+"""
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from database import apply_delta
+from query_cache import estimate_size
+
+class Snapshot:
+    """One version of a table as of a database data version"""
+
+    __slots__ = ('table', 'version', 'frame', 'max_id', 'max_seq', 'data_version', '_bytes')
+
+    def __init__(self, table, version, frame, max_id, max_seq, data_version):
+        self.table = table
+        self.version = version
+        self.frame = frame
+        self.max_id = max_id
+        self.max_seq = max_seq
+        self.data_version = data_version
+        self._bytes = None
+
+    @property
+    def bytes(self):
+        # Deep memory usage walks every string, so it is measured once per version
+        if self._bytes is None:
+            self._bytes = estimate_size(self.frame)
+        return self._bytes
+
+def _buffer(series):
+    """The array holding a column's values, to tell whether two columns share it"""
+    values = series.array
+    if isinstance(values, pd.Categorical):
+        return values.codes
+    return series.to_numpy()
+
+def private_bytes(frame, shared=None):
+    """Bytes of `frame`'s columns not shared with `shared`, and whether any column is"""
+    total, shares = 0, False
+    for col in frame.columns:
+        if (shared is not None and col in shared.columns
+                and np.may_share_memory(_buffer(frame[col]), _buffer(shared[col]))):
+            shares = True
+            continue
+        total += int(frame[col].memory_usage(deep=True, index=False))
+    return total, shares
+
+class SnapshotStore:
+    """Current snapshot of each change-tracked table, and the sessions using them"""
+
+    def __init__(self):
+        self._snapshots = {}  # (database key, table) -> Snapshot
+        self._sessions = {}  # session id -> (last seen, {name: weakref to DataFrame})
+        self._lock = threading.Lock()
+
+    def get(self, db, table):
+        """Current snapshot of `table`, first bringing it up to date if the data changed"""
+        key = (db.pool.key, table)
+        # Read the version before fetching, as cached_query does: a write
+        # landing mid-fetch leaves the snapshot tagged with the older version
+        data_version = db.pool.data_version()
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None and snapshot.data_version == data_version:
+            return snapshot
+
+        # One session updates the snapshot while the others wait for it
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot.data_version == data_version:
+                return snapshot
+            if snapshot is None:
+                delta = db.get_delta(table)
+                version, frame = 1, delta['rows']
+            else:
+                delta = db.get_delta(table, snapshot.max_id, snapshot.max_seq)
+                version, frame = snapshot.version, snapshot.frame
+                # Writes to other tables move the data version too
+                if delta['full'] or not delta['rows'].empty or delta['deleted']:
+                    version, frame = version + 1, apply_delta(frame, delta)
+            snapshot = self._snapshots[key] = Snapshot(
+                table, version, frame, delta['max_id'], delta['max_seq'], data_version
+            )
+        return snapshot
+
+    def track_session(self, session_id, frames):
+        """Record the DataFrames a session holds, for memory().
+
+        Only weak references are kept, so a session that ends drops out
+        once its state is freed.
+        """
+        refs = {name: weakref.ref(frame) for name, frame in frames.items()}
+        with self._lock:
+            self._sessions[session_id] = (time.time(), refs)
+
+    def memory(self):
+        """Bytes held by the shared snapshots and privately by each live session.
+
+        Returns (shared, sessions): one row per snapshot with the number of
+        sessions using it, and one row per session with the bytes of its
+        DataFrames that aren't shared with a current snapshot.
+        """
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+            sessions = list(self._sessions.items())
+        current = {snapshot.table: snapshot for snapshot in snapshots}
+        users = dict.fromkeys(current, 0)
+
+        session_rows = []
+        for session_id, (last_seen, refs) in sessions:
+            frames = {name: ref() for name, ref in refs.items()}
+            frames = {name: frame for name, frame in frames.items() if frame is not None}
+            if not frames:
+                with self._lock:
+                    if self._sessions.get(session_id, (None,))[0] == last_seen:
+                        del self._sessions[session_id]
+                continue
+            held = 0
+            for name, frame in frames.items():
+                snapshot = current.get(name)
+                own, shares = private_bytes(frame, snapshot.frame if snapshot else None)
+                if shares:
+                    users[name] += 1
+                held += own
+            session_rows.append({
+                'session': session_id[:8],
+                'private_bytes': held,
+                'frames': len(frames),
+                'last_seen': time.strftime('%H:%M:%S', time.localtime(last_seen)),
+            })
+
+        shared_rows = [{
+            'table': snapshot.table,
+            'version': snapshot.version,
+            'rows': len(snapshot.frame),
+            'bytes': snapshot.bytes,
+            'sessions': users[snapshot.table],
+        } for snapshot in snapshots]
+        return shared_rows, session_rows
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+SNAPSHOTS = SnapshotStore()
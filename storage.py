@@ -0,0 +1,99 @@
+"""Local content-addressed storage for uploaded documents.
+
+Files are stored as UPLOADS_DIR/<reference_type>/<sha256><ext>, so the
+same bill uploaded twice for the same kind of record is kept once.
+"""
+import hashlib
+import os
+import uuid
+from collections import namedtuple
+from pathlib import Path
+from config import Config
+
+CHUNK_SIZE = 64 * 1024
+STAGING_DIR = '.pending'  # uploads accepted but not yet stored, see uploads.py
+
+StoredFile = namedtuple('StoredFile', ['path', 'sha256', 'size'])
+
+class LocalStorage:
+    def __init__(self, root=None, max_size=None, allowed_extensions=None):
+        self.root = Path(root or Config.UPLOADS_DIR)
+        self.max_size = max_size or Config.MAX_UPLOAD_SIZE
+        self.allowed_extensions = allowed_extensions or Config.ALLOWED_EXTENSIONS
+
+    def stage(self, file):
+        """Copy an upload to the staging area and return its path.
+
+        This is the only work done while the user waits: the file is
+        checked and written out without hashing, and store_staged() later
+        moves it into place from a background worker. Raises ValueError
+        for a disallowed extension or a file over the size limit.
+        """
+        extension = self._check(file)
+        directory = self.root / STAGING_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        staged_path = directory / f"{uuid.uuid4().hex}{extension}"
+
+        size = 0
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        try:
+            with open(staged_path, 'wb') as out:
+                while True:
+                    chunk = file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise ValueError(self._too_large_message())
+                    out.write(chunk)
+        except BaseException:
+            staged_path.unlink(missing_ok=True)
+            raise
+        return str(staged_path)
+
+    def store_staged(self, staged_path, reference_type):
+        """Hash a file written by stage() and move it into place, returning a StoredFile.
+
+        The staged file is only read to hash it and is then renamed, so an
+        upload is written to disk once.
+        """
+        staged_path = Path(staged_path)
+        digest = hashlib.sha256()
+        size = 0
+        with open(staged_path, 'rb') as staged:
+            while True:
+                chunk = staged.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                digest.update(chunk)
+
+        sha256 = digest.hexdigest()
+        directory = self.root / reference_type
+        directory.mkdir(parents=True, exist_ok=True)
+        final_path = directory / f"{sha256}{staged_path.suffix}"
+        if final_path.exists():
+            # Identical content is already stored
+            staged_path.unlink()
+        else:
+            os.replace(staged_path, final_path)
+        return StoredFile(str(final_path), sha256, size)
+
+    def delete(self, path):
+        """Remove a stored file if it still exists"""
+        Path(path).unlink(missing_ok=True)
+
+    def _check(self, file):
+        """Validate extension and declared size, returning the extension"""
+        extension = Path(file.name).suffix.lower()
+        if extension not in self.allowed_extensions:
+            allowed = ', '.join(sorted(self.allowed_extensions))
+            raise ValueError(f"File type {extension or '(none)'} is not allowed (allowed: {allowed})")
+        declared_size = getattr(file, 'size', None)
+        if declared_size is not None and declared_size > self.max_size:
+            raise ValueError(self._too_large_message())
+        return extension
+
+    def _too_large_message(self):
+        return f"File is larger than the {self.max_size // (1024 * 1024)}MB upload limit"
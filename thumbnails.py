@@ -0,0 +1,90 @@
+"""Resized previews of attached images, kept next to the originals.
+
+A preview for uploads/sales/<hash>.jpg is uploads/sales/<hash>.thumb.jpg.
+Previews are made once, on upload or first view, and the oldest ones are
+evicted when their total size goes over the configured limit.
+"""
+import os
+import threading
+import uuid
+from pathlib import Path
+from config import Config
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif'}
+THUMBNAIL_SUFFIX = '.thumb.jpg'
+
+def is_image(file_name):
+    return Path(str(file_name)).suffix.lower() in IMAGE_EXTENSIONS
+
+class ThumbnailCache:
+    def __init__(self, root=None, size=None, max_bytes=None):
+        self.root = Path(root or Config.UPLOADS_DIR)
+        self.size = size or Config.THUMBNAIL_SIZE
+        self.max_bytes = max_bytes or Config.THUMBNAIL_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+
+    def thumbnail_path(self, source):
+        source = Path(source)
+        return source.with_name(source.stem + THUMBNAIL_SUFFIX)
+
+    def get(self, source):
+        """Return the preview path for a local image, creating it if needed.
+
+        Returns None when the source is missing or can't be decoded, so
+        callers can fall back to the original.
+        """
+        source = Path(source)
+        thumb = self.thumbnail_path(source)
+        if thumb.exists():
+            # Touch so eviction treats it as recently used
+            os.utime(thumb)
+            return str(thumb)
+        if not source.exists():
+            return None
+        try:
+            self._generate(source, thumb)
+        except Exception as e:
+            print(f"Error creating thumbnail for {source}: {e}")
+            return None
+        self._evict()
+        return str(thumb)
+
+    def discard(self, source):
+        """Remove the preview of a deleted original"""
+        self.thumbnail_path(source).unlink(missing_ok=True)
+
+    def _generate(self, source, thumb):
+        from PIL import Image
+
+        with Image.open(source) as img:
+            # Let the JPEG decoder downscale while decoding instead of
+            # materialising the full-resolution photo first
+            img.draft('RGB', self.size)
+            img.thumbnail(self.size)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            temp = thumb.with_name(f".thumb-{uuid.uuid4().hex}")
+            try:
+                img.save(temp, 'JPEG', quality=80, optimize=True)
+                os.replace(temp, thumb)
+            finally:
+                temp.unlink(missing_ok=True)
+
+    def _evict(self):
+        """Delete least recently used previews until under max_bytes"""
+        with self._lock:
+            thumbs = []
+            total = 0
+            for path in self.root.rglob(f"*{THUMBNAIL_SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                thumbs.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            thumbs.sort()
+            for _, size, path in thumbs:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
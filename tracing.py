@@ -0,0 +1,177 @@
+"""Per-rerun tracing of the Streamlit script.
+
+start_rerun() begins a trace for the current script run; span() and
+traced() then time nested sections of it (page, tab, data load,
+computation, chart). finish() appends the run's spans to
+Config.TRACE_PATH in the Chrome trace event format, which
+chrome://tracing and Perfetto open directly, and adds the run to the
+per-page latency stats shown on the Settings page.
+
+Spans outside a rerun, e.g. in background threads or benchmarks, cost
+one thread-local lookup and are not recorded.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+import numpy as np
+
+from config import Config
+
+_local = threading.local()
+
+class Rerun:
+    """Spans of one script run, as Chrome trace "complete" events"""
+
+    def __init__(self, page='Login'):
+        self.page = page
+        self.start = time.perf_counter()
+        self.events = []
+        self._open = []  # (name, category, start) of spans not yet ended
+        # Trace timestamps are microseconds on the wall clock, so runs
+        # from different sessions line up in the viewer
+        self._epoch_us = time.time() * 1e6 - self.start * 1e6
+
+    def begin(self, name, category='section'):
+        self._open.append((name, category, time.perf_counter()))
+
+    def end(self):
+        name, category, start = self._open.pop()
+        self._add(name, category, start, time.perf_counter())
+
+    def _add(self, name, category, start, end):
+        self.events.append({
+            'name': name, 'cat': category, 'ph': 'X',
+            'ts': round(self._epoch_us + start * 1e6),
+            'dur': round((end - start) * 1e6),
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+        })
+
+    def finish(self):
+        """End the run, closing any spans still open, and record it"""
+        if getattr(_local, 'rerun', None) is self:
+            _local.rerun = None
+        while self._open:
+            self.end()
+        end = time.perf_counter()
+        self._add(f"rerun: {self.page}", 'rerun', self.start, end)
+        self.events[-1]['args'] = {'page': self.page}
+        TRACE_STATS.add(self.page, end - self.start, self.events)
+        if Config.TRACE_ENABLED:
+            _write_events(self.events)
+
+def start_rerun():
+    """Begin tracing this script run, discarding a run that never finished"""
+    rerun = _local.rerun = Rerun()
+    return rerun
+
+@contextmanager
+def span(name, category='section'):
+    """Time the with-block as a span of the current rerun, if there is one"""
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is None:
+        yield
+        return
+    rerun.begin(name, category)
+    try:
+        yield
+    finally:
+        rerun.end()
+
+def traced(category, name=None):
+    """Decorator recording each call of a function as a span"""
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            rerun = getattr(_local, 'rerun', None)
+            if rerun is None:
+                return func(*args, **kwargs)
+            rerun.begin(span_name, category)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                rerun.end()
+        return wrapper
+    return decorate
+
+_write_lock = threading.Lock()
+
+def _write_events(events):
+    """Append events to the trace file, rotating it once it is too large.
+
+    The file is a JSON array whose closing bracket is left off, which the
+    trace event format allows, so runs can be appended without rewriting.
+    """
+    path = Path(Config.TRACE_PATH)
+    try:
+        with _write_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists() and path.stat().st_size > Config.TRACE_MAX_BYTES:
+                os.replace(path, path.with_name(path.name + '.1'))
+            new_file = not path.exists()
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('[\n' if new_file else ',\n')
+                f.write(',\n'.join(json.dumps(event) for event in events))
+    except OSError:
+        pass  # tracing must never break the page
+
+class TraceStats:
+    """Recent rerun durations per page and the slowest spans seen"""
+
+    def __init__(self, history=None, slowest=20):
+        self.history = history or Config.TRACE_HISTORY
+        self.slowest = slowest
+        self._reruns = {}  # page -> deque of seconds
+        self._spans = []  # min-heap of (dur, seq, event) for the slowest spans
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def add(self, page, seconds, events):
+        with self._lock:
+            self._reruns.setdefault(page, deque(maxlen=self.history)).append(seconds)
+            for event in events:
+                if event['cat'] == 'rerun':
+                    continue
+                self._seq += 1
+                item = (event['dur'], self._seq, dict(event, page=page))
+                if len(self._spans) < self.slowest:
+                    heapq.heappush(self._spans, item)
+                elif item[0] > self._spans[0][0]:
+                    heapq.heapreplace(self._spans, item)
+
+    def pages(self):
+        """Rerun count and p50 / p95 / max latency in ms per page"""
+        with self._lock:
+            reruns = {page: np.array(durations) * 1000 for page, durations in self._reruns.items()}
+        return [{
+            'page': page,
+            'reruns': len(ms),
+            'p50_ms': float(np.percentile(ms, 50)),
+            'p95_ms': float(np.percentile(ms, 95)),
+            'max_ms': float(ms.max()),
+        } for page, ms in sorted(reruns.items())]
+
+    def slowest_spans(self):
+        with self._lock:
+            spans = sorted(self._spans, reverse=True)
+        return [{
+            'span': event['name'],
+            'category': event['cat'],
+            'page': event['page'],
+            'ms': event['dur'] / 1000,
+        } for _, _, event in spans]
+
+    def reset(self):
+        with self._lock:
+            self._reruns.clear()
+            self._spans.clear()
+
+TRACE_STATS = TraceStats()
@@ -0,0 +1,192 @@
+"""Background upload queue for document attachments.
+
+Forms only stage the file and record it (LocalStorage.stage), which takes
+milliseconds. A small thread pool then hashes it into content-addressed
+storage and renders its preview, retrying with backoff, and updates the
+documents row with the final path and status. Jobs live in the
+upload_jobs table, so uploads interrupted by a restart are picked up
+again when the queue starts.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from thumbnails import is_image
+
+# documents.status values
+PENDING = 'pending'
+STORED = 'stored'
+FAILED = 'failed'
+
+class UploadQueue:
+    _queues = {}
+    _queues_lock = threading.Lock()
+
+    def __init__(self, db, workers=None, max_attempts=None, backoff=None):
+        self.db = db
+        self.max_attempts = max_attempts or Config.UPLOAD_MAX_ATTEMPTS
+        self.backoff = backoff if backoff is not None else Config.UPLOAD_RETRY_BACKOFF
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or Config.UPLOAD_WORKERS, thread_name_prefix='upload'
+        )
+
+    @classmethod
+    def shared(cls, db):
+        """Return the queue for db's file, starting it on first use.
+
+        One queue per database file and process, whichever Database
+        instance asks for it, so jobs are never run twice.
+        """
+        with cls._queues_lock:
+            queue = cls._queues.get(db.pool.key)
+            if queue is None:
+                queue = cls._queues[db.pool.key] = cls(db)
+                queue.resume()
+            return queue
+
+    def enqueue(self, file, reference_type, reference_id):
+        """Accept an uploaded file and return its new document id.
+
+        The document is recorded straight away with status 'pending'.
+        Raises ValueError for a disallowed or oversized file.
+        """
+        staged_path = self.db.storage.stage(file)
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO documents (reference_type, reference_id, file_path, file_name, status)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (reference_type, reference_id, staged_path, file.name, PENDING))
+                document_id = cursor.lastrowid
+                cursor.execute('''
+                    INSERT INTO upload_jobs (document_id, staged_path, reference_type)
+                    VALUES (?, ?, ?)
+                ''', (document_id, staged_path, reference_type))
+                job_id = cursor.lastrowid
+        except BaseException:
+            self.db.storage.delete(staged_path)
+            raise
+        self.executor.submit(self._run, job_id)
+        return document_id
+
+    def resume(self):
+        """Resubmit jobs left pending or running by a previous process"""
+        with self.db.get_connection() as conn:
+            job_ids = [row[0] for row in conn.execute(
+                "SELECT id FROM upload_jobs WHERE status IN ('pending', 'running') ORDER BY id"
+            )]
+        for job_id in job_ids:
+            self.executor.submit(self._run, job_id)
+        return len(job_ids)
+
+    def progress(self, document_ids):
+        """Count the given documents by status: pending, stored and failed"""
+        counts = {PENDING: 0, STORED: 0, FAILED: 0}
+        if not document_ids:
+            return counts
+        placeholders = ', '.join('?' * len(document_ids))
+        with self.db.get_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT status, COUNT(*) FROM documents
+                WHERE id IN ({placeholders})
+                GROUP BY status
+            ''', list(document_ids)).fetchall()
+        counts.update(dict(rows))
+        return counts
+
+    def errors(self, document_ids):
+        """(file name, error) of each of the given documents that failed to upload"""
+        if not document_ids:
+            return []
+        placeholders = ', '.join('?' * len(document_ids))
+        with self.db.get_connection() as conn:
+            return conn.execute(f'''
+                SELECT file_name, error FROM documents
+                WHERE id IN ({placeholders}) AND status = ?
+                ORDER BY id
+            ''', [*document_ids, FAILED]).fetchall()
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def _run(self, job_id):
+        with self.db.get_connection() as conn:
+            job = conn.execute('''
+                SELECT document_id, staged_path, reference_type, attempts
+                FROM upload_jobs WHERE id = ? AND status IN ('pending', 'running')
+            ''', (job_id,)).fetchone()
+        if job is None:
+            return
+        document_id, staged_path, reference_type, attempts = job
+
+        while True:
+            attempts += 1
+            if not self._set_job(job_id, 'running', attempts):
+                return  # cancelled because the document was deleted
+            try:
+                self._store(job_id, document_id, staged_path, reference_type)
+                return
+            except ValueError as e:
+                # Validation failures won't succeed on a retry
+                self._fail(job_id, document_id, staged_path, attempts, str(e))
+                return
+            except Exception as e:
+                if attempts >= self.max_attempts:
+                    self._fail(job_id, document_id, staged_path, attempts, str(e))
+                    return
+                self._set_job(job_id, 'pending', attempts, str(e))
+                time.sleep(self.backoff * 2 ** (attempts - 1))
+
+    def _store(self, job_id, document_id, staged_path, reference_type):
+        storage = self.db.storage
+        with self.db.get_connection() as conn:
+            # Hold the write lock from moving the file into place until it is
+            # recorded, so Database.delete_document can't remove a stored
+            # copy of the same bytes in between
+            conn.execute('BEGIN IMMEDIATE')
+            stored = storage.store_staged(staged_path, reference_type)
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE documents
+                SET file_path = ?, sha256 = ?, size = ?, status = ?, error = NULL
+                WHERE id = ?
+            ''', (stored.path, stored.sha256, stored.size, STORED, document_id))
+            found = cursor.rowcount
+            cursor.execute('''
+                UPDATE upload_jobs SET status = 'done', updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status != 'cancelled'
+            ''', (job_id,))
+            shared = cursor.execute(
+                'SELECT COUNT(*) FROM documents WHERE file_path = ?', (stored.path,)
+            ).fetchone()[0]
+            if not found and not shared:
+                # The document was deleted while it was being stored
+                storage.delete(stored.path)
+
+        if found and is_image(stored.path):
+            self.db.thumbnails.get(stored.path)
+
+    def _set_job(self, job_id, status, attempts, error=None):
+        """Update a job unless it was cancelled; returns False if it was"""
+        with self.db.get_connection() as conn:
+            cursor = conn.execute('''
+                UPDATE upload_jobs
+                SET status = ?, attempts = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status != 'cancelled'
+            ''', (status, attempts, error, job_id))
+            return cursor.rowcount > 0
+
+    def _fail(self, job_id, document_id, staged_path, attempts, error):
+        with self.db.get_connection() as conn:
+            conn.execute('''
+                UPDATE upload_jobs
+                SET status = 'failed', attempts = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status != 'cancelled'
+            ''', (attempts, error, job_id))
+            conn.execute(
+                'UPDATE documents SET status = ?, error = ? WHERE id = ?',
+                (FAILED, error, document_id)
+            )
+        self.db.storage.delete(staged_path)
@@ -0,0 +1,24 @@
+"""Page registry for the app.
+
+Each page lives in its own module exposing render(), imported the first
+time the page is selected, so a rerun only executes the page on screen.
+`tables` lists the session-state tables the page reads; they are loaded
+when a page that needs them is first opened rather than at login.
+"""
+import importlib
+from collections import namedtuple
+
+Page = namedtuple('Page', ['label', 'module', 'tables'])
+
+PAGES = {
+    'Home': Page('🏠 Home', 'views.home', ()),
+    'Inventory Management': Page('📦 Inventory Management', 'views.inventory', ()),
+    'Sales': Page('💰 Sales', 'views.sales', ('inventory', 'sales')),
+    'Credit Book': Page('📒 Credit Book', 'views.credit_book', ()),
+    'Analysis': Page('📈 Analysis', 'views.analysis', ()),
+    'Settings': Page('⚙️ Settings', 'views.settings', ()),
+}
+
+def render_page(name):
+    """Import the page's module if needed and render it"""
+    importlib.import_module(PAGES[name].module).render()
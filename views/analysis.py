@@ -0,0 +1,62 @@
+"""Analysis page: sales trends and inventory breakdown"""
+import streamlit as st
+import plotly.express as px
+
+from tracing import span
+from views.common import get_database
+
+def render():
+    db = get_database()
+    st.title("Analysis Dashboard")
+
+    # Key Metrics
+    metrics = db.get_dashboard_metrics()
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Total Inventory Value", f"₹{metrics['total_inventory_value']:,.2f}")
+
+    with col2:
+        st.metric("Total Sales", f"₹{metrics['total_sales']:,.2f}")
+
+    with col3:
+        st.metric("Total Credit", f"₹{metrics['total_credit']:,.2f}")
+
+    sales_trends()
+
+    # Inventory Analysis
+    stock_levels = db.get_stock_levels()
+    if not stock_levels.empty:
+        st.subheader("Inventory by Category")
+        category_data = stock_levels.groupby('category', observed=True)['on_hand'].sum()
+        with span('inventory by category chart', 'chart'):
+            fig = px.pie(values=category_data.values, names=category_data.index,
+                         title='Inventory Distribution by Category')
+            st.plotly_chart(fig)
+
+def sales_trends():
+    """Daily revenue and category split for the chosen dates"""
+    db = get_database()
+    # Sales Analysis, read from the daily rollup so the cost is one row
+    # per day and category rather than one per sale
+    daily_sales = db.get_daily_sales()
+    if not daily_sales.empty:
+        st.subheader("Sales Trends")
+        col1, col2 = st.columns(2)
+        with col1:
+            date_from = st.date_input("From", daily_sales['date'].min().date())
+        with col2:
+            date_to = st.date_input("To", daily_sales['date'].max().date())
+
+        daily_sales = db.get_daily_sales(date_from=date_from, date_to=date_to)
+        with span('sales trends chart', 'chart'):
+            fig = px.line(daily_sales, x='date', y=['revenue', 'profit'],
+                         title='Daily Sales Revenue and Profit')
+            st.plotly_chart(fig)
+
+        st.subheader("Sales by Category")
+        category_sales = db.get_sales_by_category(date_from=date_from, date_to=date_to)
+        with span('sales by category chart', 'chart'):
+            fig = px.pie(category_sales, values='revenue', names='category',
+                         title='Revenue by Category')
+            st.plotly_chart(fig)
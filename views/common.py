@@ -0,0 +1,239 @@
+"""Helpers shared by the page modules: the database, session tables and widgets"""
+import streamlit as st
+import pandas as pd
+import os
+import time
+from contextlib import contextmanager
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from config import Config
+from database import Database
+from snapshots import SNAPSHOTS
+from tracing import span
+from warmup import start_warmup
+
+@st.cache_resource(show_spinner=False)
+def get_database():
+    """Open the database once per server process; every session shares it"""
+    db = Database(Config.DB_PATH)
+    if Config.WARMUP_ON_START:
+        start_warmup(db)
+    return db
+
+# requests (http_client) and base64 are imported by the helpers that use
+# them, so starting a session doesn't load them
+def get_http_client():
+    """Shared HTTP client for remote documents"""
+    from http_client import get_client
+    return get_client()
+
+@contextmanager
+def traced_tab(tab, name):
+    """Enter a tab and trace what it renders as one span"""
+    with tab, span(name, 'tab'):
+        yield
+
+def load_tables(tables):
+    """Point the session's tables at the current shared snapshots.
+
+    Loads the given tables and brings every table the session already
+    holds up to date; that costs one data version check while nothing
+    has changed.
+    """
+    db = get_database()
+    versions = st.session_state.setdefault('table_versions', {})
+    for table in dict.fromkeys([*tables, *versions]):
+        snapshot = SNAPSHOTS.get(db, table)
+        if versions.get(table) != snapshot.version:
+            # Columns stay shared with the snapshot until this session modifies one
+            st.session_state[table] = snapshot.frame.copy(deep=False)
+            versions[table] = snapshot.version
+
+def refresh_table(table):
+    """Bring a session-state table up to date after a write.
+
+    Tables the session hasn't loaded are skipped; load_tables() reads them
+    when a page first needs them.
+    """
+    if table in st.session_state.get('table_versions', {}):
+        load_tables([table])
+
+def track_session_memory():
+    """Register this session's DataFrames for the memory report on the Settings page"""
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        SNAPSHOTS.track_session(ctx.session_id, {
+            key: value for key, value in st.session_state.items()
+            if isinstance(value, pd.DataFrame)
+        })
+
+# Debug function
+def debug_dataframe(df, title="DataFrame Debug Info", show_debug=False):
+    """Debug function that only shows information when show_debug is True"""
+    if show_debug:
+        st.write(f"=== {title} ===")
+        st.write("Columns:", df.columns.tolist())
+        st.write("Sample data:", df.head())
+        st.write("Shape:", df.shape)
+
+def fetch_page(key, fetch, filters):
+    """Fetch the current page of a paged view, going back to page one when its filters change"""
+    pages = st.session_state.setdefault('pages', {})
+    state = pages.get(key)
+    if state is None or state['filters'] != filters:
+        state = pages[key] = {'filters': filters, 'cursors': [None]}
+    page_df, next_cursor = fetch(after=state['cursors'][-1])
+    state['next'] = next_cursor
+    return page_df
+
+def page_controls(key):
+    """Render Previous / Next buttons for a view loaded with fetch_page"""
+    state = st.session_state.pages[key]
+    col1, col2, col3 = st.columns([1, 1, 4])
+    # Callbacks run before the next rerun, so the new page shows immediately
+    with col1:
+        st.button(
+            "◀ Previous", key=f"{key}_prev",
+            disabled=len(state['cursors']) == 1,
+            on_click=state['cursors'].pop
+        )
+    with col2:
+        st.button(
+            "Next ▶", key=f"{key}_next",
+            disabled=state['next'] is None,
+            on_click=state['cursors'].append, args=(state['next'],)
+        )
+    with col3:
+        st.caption(f"Page {len(state['cursors'])}")
+
+def credit_table(key, credits):
+    """Show a page of credit entries as one table with a selection column and return the selected ids.
+
+    A single data editor replaces an expander, columns and button per
+    row, so the number of widgets doesn't grow with the page.
+    """
+    table = credits[['id', 'customer', 'amount', 'date', 'due_date', 'description', 'contact']]
+    table.insert(0, 'selected', False)
+    edited = st.data_editor(
+        table,
+        # Keyed by the rows shown, so a selection doesn't carry over to another page
+        key=f"{key}_table_{credits['id'].iloc[0]}_{credits['id'].iloc[-1]}",
+        column_config={
+            'selected': st.column_config.CheckboxColumn("Select"),
+            'id': None,
+            'customer': "Customer",
+            'amount': st.column_config.NumberColumn("Amount", format="₹%.2f"),
+            'date': st.column_config.DateColumn("Date"),
+            'due_date': st.column_config.DateColumn("Due Date"),
+            'description': "Description",
+            'contact': "Contact",
+        },
+        disabled=['customer', 'amount', 'date', 'due_date', 'description', 'contact'],
+        hide_index=True,
+        use_container_width=True
+    )
+    return edited.loc[edited['selected'], 'id'].tolist()
+
+def set_credit_status(credit_ids, status):
+    """Button callback updating the selected credit entries in one transaction"""
+    db = get_database()
+    changed = db.update_credit_statuses(credit_ids, status)
+    refresh_table('credit_book')
+    st.toast(f"Updated {changed} credit entries")
+
+def queue_uploads(files, reference_type, reference_id):
+    """Hand uploaded files to the background queue and track them for the progress bar"""
+    db = get_database()
+    for file in files or []:
+        try:
+            document_id = db.uploads.enqueue(file, reference_type, reference_id)
+        except ValueError as e:
+            st.error(f"Failed to upload {file.name}: {e}")
+            continue
+        st.session_state.setdefault('upload_ids', []).append(document_id)
+
+def upload_progress():
+    """Show progress of this session's background uploads in the sidebar"""
+    db = get_database()
+    upload_ids = st.session_state.get('upload_ids')
+    if not upload_ids:
+        return
+    counts = db.uploads.progress(upload_ids)
+    # Documents deleted before they finished no longer count
+    total = sum(counts.values())
+    finished = counts['stored'] + counts['failed']
+    with st.sidebar:
+        if counts['pending']:
+            st.progress(finished / total, text=f"Uploading documents: {finished} of {total} done")
+            st.button("🔄 Refresh", key="upload_refresh")
+            return
+        if counts['failed']:
+            st.warning(f"{counts['failed']} of {total} documents failed to upload")
+            for file_name, error in db.uploads.errors(upload_ids):
+                st.caption(f"{file_name}: {error}")
+        else:
+            st.success(f"Uploaded {total} documents")
+    st.session_state.upload_ids = []
+
+def display_documents(reference_type, reference_id):
+    db = get_database()
+    docs = db.get_documents(reference_type, reference_id)
+    if not docs.empty:
+        st.write("Attached Documents:")
+        for _, doc in docs.iterrows():
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                file_url = doc['file_path']
+                if doc['status'] == 'pending':
+                    st.info(f"⏳ Uploading {doc['file_name']}...")
+                elif doc['status'] == 'failed':
+                    st.warning(f"Upload of {doc['file_name']} failed: {doc['error']}")
+                elif doc['file_name'].lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
+                    try:
+                        # Remote images go through the HTTP cache so they get a preview too
+                        source = file_url if os.path.exists(file_url) else get_http_client().fetch(file_url)
+                        # Lists show the small preview; the original only loads on request
+                        thumb = db.thumbnails.get(source)
+                        st.image(thumb or source, caption=doc['file_name'])
+                        if thumb and st.toggle("Full size", key=f"full_{doc['id']}"):
+                            st.image(source, use_column_width=True)
+                    except:
+                        st.error(f"Could not load image: {doc['file_name']}")
+                elif os.path.exists(file_url):
+                    # Stored locally: serve the file itself rather than a link
+                    with open(file_url, 'rb') as f:
+                        st.download_button(
+                            f"📄 Download: {doc['file_name']}", data=f,
+                            file_name=doc['file_name'], key=f"dl_{doc['id']}"
+                        )
+                elif doc['file_name'].lower().endswith('.pdf'):
+                    st.markdown(f"[📄 View PDF: {doc['file_name']}]({file_url})")
+                else:
+                    st.markdown(f"[📎 Download: {doc['file_name']}]({file_url})")
+
+            with col2:
+                if st.button("🗑️ Delete", key=f"del_{doc['id']}"):
+                    if db.delete_document(doc['id']):
+                        st.success("Document deleted!")
+                        time.sleep(1)
+                        st.rerun()
+
+def view_document(url, file_type):
+    """Display document based on its type"""
+    try:
+        if file_type in ['.png', '.jpg', '.jpeg', '.gif'] and os.path.exists(url):
+            # Local file: let Streamlit serve it without decoding it here
+            st.image(url, use_column_width=True)
+        elif file_type in ['.png', '.jpg', '.jpeg', '.gif']:
+            # Served from the disk cache unless the remote copy changed
+            st.image(get_http_client().fetch(url), use_column_width=True)
+        elif file_type == '.pdf':
+            st.markdown(
+                f'<iframe src="{url}" width="100%" height="600px"></iframe>', 
+                unsafe_allow_html=True
+            )
+        else:
+            st.markdown(f"[Download File]({url})")
+    except Exception as e:
+        st.error(f"Error viewing document: {str(e)}")
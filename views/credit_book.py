@@ -0,0 +1,237 @@
+"""Credit book page: aging summary, new credits and active / settled entries"""
+import streamlit as st
+from datetime import datetime
+
+from config import Config
+from instrumentation import timed
+from views.common import (
+    get_database, refresh_table, traced_tab, fetch_page, page_controls,
+    credit_table, set_credit_status, queue_uploads
+)
+
+@timed('add_credit')
+def add_credit(customer, amount, date, due_date, description, contact=None, status="Pending"):
+    db = get_database()
+    try:
+        query = """
+        INSERT INTO credit_book (customer, amount, date, due_date, description, contact, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        params = (customer, amount, date, due_date, description, contact, status)
+
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            credit_id = cursor.lastrowid
+            return credit_id
+    except Exception as e:
+        raise Exception(f"Failed to add credit: {str(e)}")
+
+def update_credit_status(credit_id, new_status):
+    db = get_database()
+    db.update_credit_status(credit_id, new_status)
+    # Refresh session state
+    refresh_table('credit_book')
+
+def render():
+    db = get_database()
+    st.title("Credit Book")
+
+    # Aging summary of outstanding credit
+    aging = db.get_credit_aging()
+    bucket_labels = {
+        'current': "Not Yet Due", '1-30': "1–30 Days",
+        '31-60': "31–60 Days", '61-90': "61–90 Days", '90+': "90+ Days"
+    }
+    for col, row in zip(st.columns(len(aging)), aging.itertuples()):
+        with col:
+            st.metric(bucket_labels[row.bucket], f"₹{row.amount:,.2f}",
+                      help=f"{row.entries} entries")
+    if aging['entries'].sum() > 0:
+        with st.expander("Aging by Customer"):
+            st.dataframe(
+                db.get_customer_aging().rename(columns=bucket_labels),
+                column_config={
+                    'customer': "Customer",
+                    'entries': "Entries",
+                    'total': st.column_config.NumberColumn("Total", format="₹%.2f"),
+                    'due_date': st.column_config.DateColumn("Oldest Due Date"),
+                    **{label: st.column_config.NumberColumn(format="₹%.2f")
+                       for label in bucket_labels.values()},
+                },
+                hide_index=True
+            )
+        with st.expander("Overdue Credits"):
+            overdue = db.get_overdue_credits(limit=Config.PAGE_SIZE)
+            if overdue.empty:
+                st.info("No overdue credits")
+            else:
+                st.dataframe(
+                    overdue[['customer', 'amount', 'due_date', 'days_overdue', 'contact']],
+                    column_config={
+                        'amount': st.column_config.NumberColumn(format="₹%.2f"),
+                        'due_date': st.column_config.DateColumn("Due Date"),
+                        'days_overdue': "Days Overdue",
+                    },
+                    hide_index=True
+                )
+
+    tab1, tab2, tab3 = st.tabs(["Add Credit", "Active Credits", "Settled Bills"])
+
+    with traced_tab(tab1, "Add Credit"):
+        with st.form("credit_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                customer = st.text_input("Customer Name")
+                amount = st.number_input("Amount", min_value=0.0)
+                date = st.date_input("Date", datetime.now())
+            with col2:
+                contact = st.text_input("Contact Number")  # Added contact field
+                description = st.text_area("Description")
+                due_date = st.date_input("Due Date", datetime.now())
+
+            uploaded_files = st.file_uploader(
+                "Upload Documents",
+                accept_multiple_files=True,
+                type=['png', 'jpg', 'jpeg', 'pdf', 'gif']
+            )
+            submitted = st.form_submit_button("Add Credit Entry")
+
+            if submitted:
+                if not customer or amount <= 0:
+                    st.error("Please fill all required fields")
+                else:
+                    try:
+                        # Add credit entry and get the new credit ID
+                        credit_id = add_credit(
+                            customer=customer,
+                            amount=amount,
+                            date=date,
+                            due_date=due_date,
+                            description=description,
+                            contact=contact,
+                            status="Pending"
+                        )
+
+                        if credit_id:
+                            queue_uploads(uploaded_files, 'credit', credit_id)
+                            st.success(f"Added credit entry for {customer}")
+                            # Force refresh the credit book data
+                            refresh_table('credit_book')
+                            st.rerun()
+                        else:
+                            st.error("Failed to add credit entry")
+                    except Exception as e:
+                        st.error(f"Error adding credit: {str(e)}")
+
+    with traced_tab(tab2, "Active Credits"):
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            active_search = st.text_input("🔍 Search Credits", key="active_search")
+        with col2:
+            overdue_only = st.checkbox("Overdue only", key="active_overdue")
+        with col3:
+            view = st.radio("View", ["Table", "Details"], horizontal=True, key="active_view")
+
+        # Only the current page is fetched, with filters applied in SQL
+        due_before = datetime.now().date() if overdue_only else None
+        active_credits = fetch_page(
+            'active_credits',
+            lambda after: db.get_credit_page(
+                settled=False, search=active_search, due_before=due_before, after=after
+            ),
+            (active_search, due_before)
+        )
+
+        if active_credits.empty:
+            st.info("No active credits")
+        elif view == "Table":
+            selected = credit_table('active_credits', active_credits)
+            st.button(
+                f"✅ Mark {len(selected)} as Paid", key="active_mark_paid",
+                disabled=not selected,
+                on_click=set_credit_status, args=(selected, 'Paid')
+            )
+        else:
+            for _, row in active_credits.iterrows():
+                with st.expander(f"{row['customer']} - ₹{row['amount']:,.2f}"):
+                    col1, col2 = st.columns(2)
+
+                    with col1:
+                        st.write(f"Description: {row['description']}")
+                        st.write(f"Date: {row['date']:%Y-%m-%d}")
+                        st.write(f"Due Date: {row['due_date']:%Y-%m-%d}")
+                        if row.get('contact'):
+                            st.write(f"Contact: {row['contact']}")
+
+                    with col2:
+                        if st.button("Mark as Paid", key=f"pay_{row['id']}"):
+                            db.update_credit_status(row['id'], 'Paid')
+                            st.success("Updated!")
+                            refresh_table('credit_book')
+                            st.rerun()
+        page_controls('active_credits')
+
+    with traced_tab(tab3, "Settled Bills"):
+        min_date, max_date = db.get_credit_date_range(settled=True)
+
+        if min_date is not None:
+            # Add search and filter
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                search = st.text_input("🔍 Search by Customer Name")
+            with col2:
+                try:
+                    date_range = st.date_input(
+                        "Filter by Date Range",
+                        value=(min_date, max_date),
+                        key="settled_date_range"
+                    )
+                except Exception as e:
+                    date_range = None
+            with col3:
+                view = st.radio("View", ["Table", "Details"], horizontal=True, key="settled_view")
+
+            # Apply filters in SQL and fetch the current page
+            date_from, date_to = (
+                date_range if date_range and len(date_range) == 2 else (None, None)
+            )
+            filtered_credits = fetch_page(
+                'settled_credits',
+                lambda after: db.get_credit_page(
+                    settled=True, search=search,
+                    date_from=date_from, date_to=date_to, after=after
+                ),
+                (search, date_from, date_to)
+            )
+
+            # Display settled credits
+            if filtered_credits.empty:
+                st.info("No settled bills match the filters")
+            elif view == "Table":
+                selected = credit_table('settled_credits', filtered_credits)
+                st.button(
+                    f"↩️ Reactivate {len(selected)}", key="settled_reactivate",
+                    disabled=not selected,
+                    on_click=set_credit_status, args=(selected, 'Pending')
+                )
+            else:
+                for _, row in filtered_credits.iterrows():
+                    with st.expander(f"{row['customer']} - ₹{row['amount']:,.2f} (Settled)"):
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.write(f"Description: {row['description']}")
+                            st.write(f"Date: {row['date']:%Y-%m-%d}")
+                            st.write(f"Due Date: {row['due_date']:%Y-%m-%d}")
+                            if row.get('contact'):
+                                st.write(f"Contact: {row['contact']}")
+
+                        with col2:
+                            if st.button("Reactivate Credit", key=f"reactivate_{row['id']}"):
+                                db.update_credit_status(row['id'], 'Pending')
+                                st.success("Credit reactivated!")
+                                refresh_table('credit_book')
+                                st.rerun()
+            page_controls('settled_credits')
+        else:
+            st.info("No settled bills yet")
@@ -0,0 +1,96 @@
+"""Business dashboard: headline metrics, credit aging and stock movement"""
+import streamlit as st
+
+from views.common import get_database
+
+def render():
+    db = get_database()
+    st.title("Business Dashboard")
+
+    # Top Level Metrics, aggregated in SQL
+    metrics = db.get_dashboard_metrics()
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Total Inventory Value", f"₹{metrics['total_inventory_value']:,.2f}")
+
+    with col2:
+        st.metric("Total Sales", f"₹{metrics['total_sales']:,.2f}")
+
+    with col3:
+        st.metric("Total Pending", f"₹{metrics['total_pending']:,.2f}")
+
+    with col4:
+        st.metric("Total Items", metrics['total_items'])
+
+    # Credit Summary from the aging report
+    aging = db.get_credit_aging().set_index('bucket')
+    if aging['entries'].sum() > 0:
+        st.subheader("Credit Summary")
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("Outstanding Credit", f"₹{aging['amount'].sum():,.2f}")
+
+        with col2:
+            overdue = aging.drop('current')
+            st.metric("Overdue", f"₹{overdue['amount'].sum():,.2f}",
+                      help=f"{overdue['entries'].sum()} entries past their due date")
+
+        with col3:
+            st.metric("Overdue 90+ Days", f"₹{aging.loc['90+', 'amount']:,.2f}")
+
+    # Stock Movement Analysis
+    st.subheader("Stock Movement Analysis")
+
+    # Per-product quantities come pre-aggregated from stock_levels
+    stock_movement = db.get_stock_movement()
+
+    if not stock_movement.empty:
+        # Display filters
+        col1, col2 = st.columns([2, 2])
+        with col1:
+            search = st.text_input("Search Products")
+        with col2:
+            category_filter = st.multiselect("Filter by Category", 
+                                           options=stock_movement['category'].unique())
+
+        # Apply filters; search goes through the full-text index
+        if search:
+            stock_movement = db.get_stock_movement(search=search)
+        if category_filter:
+            stock_movement = stock_movement[stock_movement['category'].isin(category_filter)]
+
+        # Display the stock movement table
+        st.dataframe(
+            stock_movement,
+            column_config={
+                'product_id': st.column_config.TextColumn("Product ID"),
+                'category': st.column_config.TextColumn("Category"),
+                'quantity_bought': st.column_config.NumberColumn(
+                    "Quantity Bought",
+                    help="Total units purchased"
+                ),
+                'quantity_sold': st.column_config.NumberColumn(
+                    "Quantity Sold",
+                    help="Total units sold in selected period"
+                ),
+                'quantity_remaining': st.column_config.NumberColumn(
+                    "Quantity Remaining",
+                    help="Current available stock"
+                )
+            },
+            hide_index=True
+        )
+
+        # Show summary for filtered data
+        st.subheader("Summary")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Products", len(stock_movement))
+        with col2:
+            st.metric("Total Units Sold", f"{stock_movement['quantity_sold'].sum():,}")
+        with col3:
+            st.metric("Total Units Remaining", f"{stock_movement['quantity_remaining'].sum():,}")
+    else:
+        st.info("No inventory data available")
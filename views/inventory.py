@@ -0,0 +1,250 @@
+"""Inventory page: add purchases, browse stock and low stock alerts"""
+import streamlit as st
+from datetime import datetime
+
+from config import Config
+from tracing import span
+from views.common import (
+    get_database, refresh_table, traced_tab, fetch_page, page_controls,
+    queue_uploads, display_documents
+)
+
+def calculate_cost_per_unit(total_price, variable_expenses, quantity):
+    """Calculate cost per unit including variable expenses"""
+    try:
+        total_cost = total_price + variable_expenses
+        return round(total_cost / quantity, 2) if quantity > 0 else 0
+    except:
+        return 0
+
+def add_item(item, category, quantity, date, total_purchase_price, variable_expenses, supplier):
+    db = get_database()
+    cost_per_unit = calculate_cost_per_unit(total_purchase_price, variable_expenses, quantity)
+    item_id = db.add_inventory_item(
+        item, category, quantity, date, total_purchase_price,
+        variable_expenses, cost_per_unit, supplier
+    )
+    # Refresh session state
+    refresh_table('inventory')
+    return item_id
+
+def calculate_total_quantity(item):
+    """Calculate current quantity for an item"""
+    db = get_database()
+    return db.calculate_total_quantity(item)
+
+def calculate_profit_margin(row):
+    """Calculate profit margin percentage for a single item"""
+    if row['Purchase Price'] > 0:
+        margin = ((row['Selling Price'] - row['Purchase Price']) / row['Purchase Price'] * 100)
+        return round(margin, 2)
+    return 0
+
+def calculate_item_metrics(item_df):
+    """Calculate various metrics for inventory items"""
+    df = item_df.copy(deep=False)
+
+    # Calculate current quantity
+    df['Current Quantity'] = df['item'].apply(calculate_total_quantity)
+
+    # Calculate total investment
+    df['Total Investment'] = df['Purchase Price'] * df['quantity_purchased']
+
+    # Calculate potential revenue
+    df['Potential Revenue'] = df['Selling Price'] * df['Current Quantity']
+
+    # Calculate profit margin
+    df['Profit Margin %'] = df.apply(calculate_profit_margin, axis=1)
+
+    # Calculate potential profit
+    df['Potential Profit'] = df['Potential Revenue'] - (df['Current Quantity'] * df['Purchase Price'])
+
+    return df
+
+def render():
+    st.title("Inventory Management System")
+
+    tab1, tab2, tab3 = st.tabs(["Add Inventory", "View Inventory", "Low Stock Alert"])
+
+    with traced_tab(tab1, "Add Inventory"):
+        with st.form(key="add_item_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                item = st.text_input("Item Name")
+                category = st.selectbox("Category", options=st.session_state.categories)
+                quantity = st.number_input("Quantity", min_value=1, step=1)
+                date = st.date_input("Purchase Date", value=datetime.today())
+
+            with col2:
+                total_purchase_price = st.number_input(
+                    "Total Purchase Price", 
+                    min_value=0.0, 
+                    step=0.01,
+                    help="Total amount paid for the entire purchase"
+                )
+                variable_expenses = st.number_input(
+                    "Variable Expenses", 
+                    min_value=0.0, 
+                    step=0.01,
+                    help="Additional expenses (transport, handling, etc.)"
+                )
+                supplier = st.selectbox("Supplier", options=st.session_state.suppliers)
+
+                # Show real-time cost calculation
+                if quantity > 0 and (total_purchase_price > 0 or variable_expenses > 0):
+                    cost_per_unit = calculate_cost_per_unit(total_purchase_price, variable_expenses, quantity)
+                    st.write(f"Cost Per Unit: ₹{cost_per_unit:.2f}")
+                    st.write(f"Total Cost: ₹{(total_purchase_price + variable_expenses):.2f}")
+
+            # Add file upload field
+            uploaded_files = st.file_uploader(
+                "Upload Bills/Documents", 
+                accept_multiple_files=True,
+                type=['png', 'jpg', 'jpeg', 'pdf']
+            )
+
+            submit = st.form_submit_button("Add Item")
+            if submit:
+                if not item:
+                    st.error("Item name is required!")
+                elif quantity <= 0:
+                    st.error("Quantity must be greater than 0!")
+                elif total_purchase_price <= 0:
+                    st.error("Purchase price must be greater than 0!")
+                else:
+                    # Add item to inventory
+                    item_id = add_item(item, category, quantity, date, total_purchase_price, 
+                                       variable_expenses, supplier)
+
+                    # Uploaded files are stored in the background
+                    queue_uploads(uploaded_files, 'inventory', item_id)
+
+                    st.success(f"Added {quantity} units of {item} to inventory")
+
+    with traced_tab(tab2, "View Inventory"):
+        view_inventory()
+
+    with traced_tab(tab3, "Low Stock Alert"):
+        low_stock_alert()
+
+def view_inventory():
+    """Inventory table, stock movement and documents"""
+    db = get_database()
+    if db.get_dashboard_metrics()['total_items']:
+        # Search and filter
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            search = st.text_input("Search Items")
+        with col2:
+            category_filter = st.multiselect("Filter by Category", 
+                                           options=st.session_state.categories)
+
+        # Display summary metrics, aggregated in SQL; search goes through
+        # the full-text index
+        totals = db.get_inventory_totals(search=search, categories=category_filter)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Items", totals['items'])
+        with col2:
+            st.metric("Total Investment", f"₹{totals['investment']:,.2f}")
+        with col3:
+            st.metric("Total Remaining Units", f"{totals['remaining']:,.0f}")
+        with col4:
+            st.metric("Total Sold Units", f"{totals['sold']:,.0f}")
+
+        # Display detailed inventory table, one page at a time
+        st.subheader("Inventory Details")
+        display_cols = [
+            'item', 'category', 'quantity_purchased', 'Total Sold', 
+            'Remaining Quantity', 'cost_per_unit', 'total_purchase_price', 
+            'variable_expenses', 'supplier', 'date_purchased'
+        ]
+        sort_options = {
+            'Remaining Stock': 'remaining',
+            'Newest First': 'newest',
+            'Purchase Date': 'purchase_date'
+        }
+        sort_by = st.selectbox("Sort by", options=list(sort_options), key="inventory_sort")
+        inventory_page = fetch_page(
+            'inventory_details',
+            lambda after: db.get_inventory_page(
+                search=search, categories=category_filter,
+                sort=sort_options[sort_by], after=after
+            ),
+            (search, tuple(category_filter), sort_by)
+        )
+
+        st.dataframe(
+            inventory_page[display_cols],
+            column_config={
+                'cost_per_unit': st.column_config.NumberColumn(format="₹%.2f"),
+                'total_purchase_price': st.column_config.NumberColumn(format="₹%.2f"),
+                'variable_expenses': st.column_config.NumberColumn(format="₹%.2f"),
+                'date_purchased': st.column_config.DateColumn("Purchase Date"),
+                'Remaining Quantity': st.column_config.NumberColumn(
+                    "Remaining Stock",
+                    help="Current available stock after sales"
+                ),
+                'Total Sold': st.column_config.NumberColumn(
+                    "Total Sold",
+                    help="Total units sold from this batch"
+                )
+            }
+        )
+        page_controls('inventory_details')
+
+        # Show stock movement for the matching items with the most stock
+        st.subheader("Stock Movement")
+        movement_data = db.get_stock_movement(
+            search=search, categories=category_filter, limit=Config.PAGE_SIZE
+        )
+        st.caption(f"Top {Config.PAGE_SIZE} items by remaining stock")
+
+        with span('stock movement chart', 'chart'):
+            import plotly.graph_objects as go
+            fig = go.Figure(data=[
+                go.Bar(name='Purchased', x=movement_data['product_id'], y=movement_data['quantity_bought']),
+                go.Bar(name='Sold', x=movement_data['product_id'], y=movement_data['quantity_sold']),
+                go.Bar(name='Remaining', x=movement_data['product_id'], y=movement_data['quantity_remaining'])
+            ])
+            fig.update_layout(barmode='group', title='Stock Movement by Item')
+            st.plotly_chart(fig)
+
+        # Add document display for the items on this page
+        st.subheader("Item Documents")
+        items_on_page = inventory_page.drop_duplicates('item').set_index('item')['id']
+        selected_item = st.selectbox(
+            "Select Item to View Documents",
+            options=items_on_page.index
+        )
+        if selected_item:
+            display_documents('inventory', int(items_on_page[selected_item]))
+    else:
+        st.info("No items in inventory")
+
+def low_stock_alert():
+    """Items at or below the low stock threshold"""
+    db = get_database()
+    st.subheader("Low Stock Alert")
+    threshold = st.number_input("Low Stock Threshold", value=5, min_value=1)
+
+    # Only the current page of matching items is fetched
+    low_stock = fetch_page(
+        'low_stock',
+        lambda after: db.get_low_stock_page(threshold, after=after),
+        (threshold,)
+    )
+    if not low_stock.empty:
+        st.warning(f"Items below threshold ({threshold} units)")
+        st.dataframe(
+            low_stock[['item', 'category', 'Remaining Quantity', 'supplier']],
+            column_config={
+                'Remaining Quantity': st.column_config.NumberColumn(
+                    "Remaining Stock",
+                    help="Current available stock"
+                )
+            }
+        )
+        page_controls('low_stock')
+    else:
+        st.success("No items are running low on stock")
@@ -0,0 +1,252 @@
+"""Sales page: record sales and browse them"""
+import streamlit as st
+from datetime import datetime
+
+from views.common import (
+    get_database, refresh_table, traced_tab, fetch_page, page_controls,
+    queue_uploads, display_documents
+)
+
+def calculate_sale_metrics(product_id, quantity, sale_price):
+    """Calculate price per unit and profit metrics"""
+    try:
+        # Get cost per unit from inventory
+        item_data = st.session_state.inventory[
+            st.session_state.inventory['item'] == product_id
+        ].iloc[-1]
+
+        cost_per_unit = item_data['cost_per_unit']
+        price_per_unit = sale_price / quantity
+        profit_per_unit = price_per_unit - cost_per_unit
+        total_profit = profit_per_unit * quantity
+
+        return {
+            'Category': item_data['category'],
+            'Cost_Per_Unit': cost_per_unit,
+            'Price_Per_Unit': price_per_unit,
+            'Profit_Per_Unit': profit_per_unit,
+            'Total_Profit': total_profit
+        }
+    except Exception as e:
+        st.error(f"Error calculating metrics: {str(e)}")
+        return None
+
+def record_sale(product_id, quantity, sale_date, sale_price, payment_type, amount_received, amount_pending):
+    db = get_database()
+    metrics = calculate_sale_metrics(product_id, quantity, sale_price)
+    if metrics:
+        sale_id = db.add_sale(
+            product_id, metrics['Category'], quantity, sale_date, sale_price,
+            metrics['Price_Per_Unit'], metrics['Cost_Per_Unit'],
+            metrics['Profit_Per_Unit'], payment_type, amount_received, amount_pending
+        )
+        # Refresh session state
+        refresh_table('sales')
+        return sale_id
+    return None
+
+def render():
+    db = get_database()
+    st.title("Sales Management")
+
+    tab1, tab2 = st.tabs(["Record Sale", "View Sales"])
+
+    with traced_tab(tab1, "Record Sale"):
+        with st.form("sales_form"):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                # Get available items from inventory
+                available_items = st.session_state.inventory['item'].unique() if not st.session_state.inventory.empty else []
+                product_id = st.selectbox("Select Product", options=[''] + list(available_items))
+
+                if product_id:
+                    # Get item details from inventory
+                    item_data = st.session_state.inventory[
+                        st.session_state.inventory['item'] == product_id
+                    ].iloc[-1]
+
+                    # Calculate available quantity
+                    available_quantity = db.calculate_total_quantity(product_id)
+                    cost_per_unit = item_data['cost_per_unit']
+                    category = item_data['category']
+
+                    st.info(f"""
+                    Available Quantity: {available_quantity} units
+                    Cost Per Unit: ₹{cost_per_unit:,.2f}
+                    Category: {category}
+                    """)
+
+                    quantity = st.number_input(
+                        "Quantity", 
+                        min_value=1,
+                        max_value=int(available_quantity) if available_quantity > 0 else 1,
+                        value=1
+                    )
+
+                    sale_date = st.date_input("Sale Date", value=datetime.today())
+
+            with col2:
+                if product_id:
+                    sale_price = st.number_input("Total Sale Price", 
+                                               min_value=0.0,
+                                               step=0.01)
+
+                    # Payment type selection
+                    payment_type = st.selectbox(
+                        "Payment Type",
+                        options=["Cash", "UPI", "Credit", "Partial"]
+                    )
+
+                    # Show credit/partial payment fields if selected
+                    if payment_type in ["Credit", "Partial"]:
+                        st.write("---")
+                        st.write("Credit Details")
+                        customer_name = st.text_input("Customer Name", key="credit_customer_name")
+                        customer_phone = st.text_input("Customer Phone", key="credit_customer_phone")
+
+                        if payment_type == "Credit":
+                            amount_received = 0.0
+                            amount_pending = sale_price
+                            st.info(f"Full amount of ₹{sale_price:,.2f} will be added to credit")
+                        else:  # Partial payment
+                            amount_received = st.number_input(
+                                "Amount Received",
+                                min_value=0.0,
+                                max_value=sale_price,
+                                step=0.01
+                            )
+                            amount_pending = sale_price - amount_received
+                            st.info(f"Pending amount: ₹{amount_pending:,.2f}")
+                    else:
+                        amount_received = sale_price
+                        amount_pending = 0.0
+                        customer_name = ""
+                        customer_phone = ""
+
+                    # Calculate and display metrics
+                    if quantity > 0 and sale_price > 0:
+                        price_per_unit = sale_price / quantity
+                        profit_per_unit = price_per_unit - cost_per_unit
+                        total_profit = profit_per_unit * quantity
+                        profit_margin = (profit_per_unit / cost_per_unit * 100)
+
+                        st.write("---")
+                        st.write("Sale Summary")
+                        st.write(f"""
+                        Price Per Unit: ₹{price_per_unit:,.2f}
+                        Profit Per Unit: ₹{profit_per_unit:,.2f}
+                        Total Profit: ₹{total_profit:,.2f}
+                        Profit Margin: {profit_margin:,.1f}%
+                        """)
+
+            # Add file upload field before the submit button
+            st.write("---")
+            uploaded_files = st.file_uploader(
+                "Upload Bills/Receipts", 
+                accept_multiple_files=True,
+                type=['png', 'jpg', 'jpeg', 'pdf']
+            )
+
+            # Submit button
+            submitted = st.form_submit_button("Record Sale")
+
+            if submitted:
+                try:
+                    if not product_id:
+                        st.error("Please select a product!")
+                    elif sale_price <= 0:
+                        st.error("Sale price must be greater than 0!")
+                    elif quantity <= 0:
+                        st.error("Quantity must be greater than 0!")
+                    elif payment_type in ["Credit", "Partial"] and not customer_name:
+                        st.error("Customer name is required for credit transactions!")
+                    else:
+                        # Record the sale
+                        sale_id = record_sale(
+                            product_id, quantity, sale_date, sale_price,
+                            payment_type, amount_received, amount_pending
+                        )
+                        if sale_id:
+                            # Uploaded files are stored in the background
+                            queue_uploads(uploaded_files, 'sales', sale_id)
+
+                            st.success(f"Recorded sale of {quantity} {product_id}")
+                            if amount_pending > 0:
+                                st.info(f"Added ₹{amount_pending:,.2f} to credit book")
+                            st.rerun()
+                        else:
+                            st.error("Failed to record sale")
+                except Exception as e:
+                    st.error(f"Error recording sale: {str(e)}")
+
+    with traced_tab(tab2, "View Sales"):
+        view_sales()
+
+def view_sales():
+    """Sales table with totals and documents"""
+    db = get_database()
+    if not st.session_state.sales.empty:
+        sales = st.session_state.sales
+
+        # Search and filter
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            search = st.text_input("Search by Product ID")
+        with col2:
+            category_filter = st.multiselect("Filter by Category", 
+                                           options=sales['category'].unique())
+        with col3:
+            payment_filter = st.multiselect("Filter by Payment Type",
+                                          options=sales['payment_type'].unique())
+
+        # Display summary metrics for the filtered sales
+        totals = db.get_sales_totals(search, category_filter, payment_filter)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Sales", f"₹{totals['sales']:,.2f}")
+        with col2:
+            st.metric("Amount Received", f"₹{totals['received']:,.2f}")
+        with col3:
+            st.metric("Amount Pending", f"₹{totals['pending']:,.2f}")
+        with col4:
+            st.metric("Total Profit", f"₹{totals['profit']:,.2f}")
+
+        # Display detailed sales table, one page at a time
+        st.subheader("Sales Details")
+        sales_page = fetch_page(
+            'sales_details',
+            lambda after: db.get_sales_page(
+                search=search, categories=category_filter,
+                payment_types=payment_filter, after=after
+            ),
+            (search, tuple(category_filter), tuple(payment_filter))
+        )
+        st.dataframe(
+            sales_page,
+            column_config={
+                'sale_price': st.column_config.NumberColumn("Sale Price", format="₹%.2f"),
+                'price_per_unit': st.column_config.NumberColumn("Price Per Unit", format="₹%.2f"),
+                'cost_per_unit': st.column_config.NumberColumn("Cost Per Unit", format="₹%.2f"),
+                'profit_per_unit': st.column_config.NumberColumn("Profit Per Unit", format="₹%.2f"),
+                'amount_received': st.column_config.NumberColumn("Amount Received", format="₹%.2f"),
+                'amount_pending': st.column_config.NumberColumn("Amount Pending", format="₹%.2f"),
+                'sale_date': st.column_config.DateColumn("Sale Date"),
+                'payment_type': st.column_config.TextColumn("Payment Type", help="Type of payment")
+            },
+            hide_index=True
+        )
+        page_controls('sales_details')
+
+        # Add document display for the sales on this page
+        st.subheader("Sale Documents")
+        sales_by_id = sales_page.set_index('id')
+        selected_sale = st.selectbox(
+            "Select Sale to View Documents",
+            options=sales_by_id.index,
+            format_func=lambda x: f"Sale {x}: {sales_by_id.loc[x, 'product_id']} - {sales_by_id.loc[x, 'sale_date']:%Y-%m-%d}"
+        )
+        if selected_sale is not None:
+            display_documents('sales', selected_sale)
+    else:
+        st.info("No sales recorded")
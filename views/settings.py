@@ -0,0 +1,115 @@
+"""Settings page: page and query performance and memory statistics"""
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from config import Config
+from instrumentation import QUERY_STATS, LATENCY_BUCKETS_MS
+from query_cache import QUERY_CACHE
+from snapshots import SNAPSHOTS
+from tracing import TRACE_STATS
+
+def reset_statistics():
+    QUERY_STATS.reset()
+    TRACE_STATS.reset()
+
+def render():
+    st.title("Settings")
+
+    st.subheader("Page Performance")
+    page_stats = pd.DataFrame(TRACE_STATS.pages())
+    if page_stats.empty:
+        st.info("No page loads recorded yet")
+    else:
+        st.caption(
+            f"Whole-script rerun time per page over the last {Config.TRACE_HISTORY} reruns. "
+            f"Every rerun is traced to {Config.TRACE_PATH}, which chrome://tracing "
+            f"and ui.perfetto.dev can open"
+        )
+        st.dataframe(
+            page_stats.round(1), hide_index=True, use_container_width=True,
+            column_config={'page': 'Page', 'reruns': 'Reruns', 'p50_ms': 'p50 (ms)',
+                           'p95_ms': 'p95 (ms)', 'max_ms': 'Max (ms)'}
+        )
+        with st.expander("Slowest spans"):
+            st.dataframe(
+                pd.DataFrame(TRACE_STATS.slowest_spans()).round(1),
+                hide_index=True, use_container_width=True
+            )
+
+    st.subheader("Query Performance")
+    st.caption(
+        f"Timings since the app started. Calls slower than {Config.SLOW_QUERY_MS:g} ms "
+        f"are logged with their query plans to {Config.QUERY_LOG_PATH}"
+    )
+    method_stats = pd.DataFrame(QUERY_STATS.snapshot('method'))
+    if method_stats.empty:
+        st.info("No database calls recorded yet")
+    else:
+        columns = ['name', 'calls', 'errors', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'total_ms', 'rows']
+        st.dataframe(
+            method_stats[columns].round(2), hide_index=True, use_container_width=True,
+            column_config={'name': 'Method', 'p50_ms': 'p50 (≤ ms)', 'p95_ms': 'p95 (≤ ms)'}
+        )
+
+        latency_histogram(method_stats)
+
+        with st.expander("SQL statements"):
+            statement_stats = pd.DataFrame(QUERY_STATS.snapshot('statement'))
+            if not statement_stats.empty:
+                st.dataframe(
+                    statement_stats[columns].round(2), hide_index=True, use_container_width=True,
+                    column_config={'name': 'Statement', 'p50_ms': 'p50 (≤ ms)', 'p95_ms': 'p95 (≤ ms)'}
+                )
+
+    st.subheader("Memory")
+    shared, sessions = SNAPSHOTS.memory()
+    cache = QUERY_CACHE.stats()
+    shared_mb = sum(row['bytes'] for row in shared) / 2**20
+    private_mb = sum(row['private_bytes'] for row in sessions) / 2**20
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Shared tables", f"{shared_mb:,.1f} MB")
+    with col2:
+        st.metric(f"Held by {len(sessions)} sessions", f"{private_mb:,.1f} MB")
+    with col3:
+        st.metric("Query cache", f"{cache['bytes'] / 2**20:,.1f} MB")
+    if shared:
+        st.caption("One snapshot of each table is shared by every session; sessions only hold the columns they changed")
+        shared = pd.DataFrame(shared).assign(mb=lambda df: df.pop('bytes') / 2**20)
+        st.dataframe(
+            shared.round(2), hide_index=True, use_container_width=True,
+            column_config={'table': 'Table', 'version': 'Version', 'rows': 'Rows',
+                           'sessions': 'Sessions', 'mb': 'MB'}
+        )
+    if sessions:
+        sessions = pd.DataFrame(sessions).assign(mb=lambda df: df.pop('private_bytes') / 2**20)
+        st.dataframe(
+            sessions.round(3), hide_index=True, use_container_width=True,
+            column_config={'session': 'Session', 'frames': 'DataFrames',
+                           'last_seen': 'Last seen', 'mb': 'Private MB'}
+        )
+
+    recent = list(QUERY_STATS.recent)
+    if recent:
+        st.subheader("Slow Queries and Errors")
+        for entry in reversed(recent):
+            with st.expander(f"{entry['time']} · {entry['event']} · {entry['name'][:80]} · {entry['ms']:.1f} ms"):
+                if entry.get('error'):
+                    st.error(entry['error'])
+                if entry.get('kind') == 'statement':
+                    st.code(entry['name'], language='sql')
+                if entry.get('plan'):
+                    st.text('\n'.join(entry['plan']))
+                if entry.get('rows') is not None:
+                    st.caption(f"{entry['rows']} rows")
+
+    st.button("Reset statistics", on_click=reset_statistics)
+
+def latency_histogram(method_stats):
+    """Histogram of the latencies of one chosen method"""
+    selected = st.selectbox("Latency histogram for", method_stats['name'])
+    counts = method_stats.set_index('name').loc[selected, 'histogram']
+    labels = [f"≤{bound:g} ms" for bound in LATENCY_BUCKETS_MS[:-1]]
+    labels.append(f">{LATENCY_BUCKETS_MS[-2]:g} ms")
+    st.plotly_chart(px.bar(x=labels, y=counts, labels={'x': 'Latency', 'y': 'Calls'}))
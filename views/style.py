@@ -0,0 +1,60 @@
+"""Theme colours and the CSS injected on every rerun, built once at import"""
+
+THEME = {
+    'bg_color': '#ffffff',
+    'secondary_bg': '#f0f2f6',
+    'sidebar_bg': '#f8f9fa',
+    'text_color': '#1E3D59',
+    'secondary_text': '#666666',
+    'accent': '#2E7DAF',
+    'success': '#28A745',
+    'error': '#DC3545',
+    'warning': '#FFC107'
+}
+
+CSS = f'''
+<style>
+    /* Main layout */
+    .main {{
+        background-color: {THEME['bg_color']};
+        color: {THEME['text_color']};
+    }}
+
+    /* Sidebar */
+    [data-testid="stSidebar"] {{
+        background-color: {THEME['sidebar_bg']};
+        padding: 2rem 1rem;
+    }}
+
+    /* Headers */
+    h1, h2, h3 {{
+        color: {THEME['text_color']} !important;
+    }}
+
+    /* Metrics */
+    [data-testid="metric-container"] {{
+        background-color: {THEME['secondary_bg']};
+        border: 1px solid {THEME['accent']};
+        padding: 1rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }}
+
+    /* Buttons */
+    .stButton > button {{
+        background-color: {THEME['accent']};
+        color: white;
+        border-radius: 8px;
+        padding: 0.5rem 2rem;
+        font-weight: bold;
+        border: none;
+        transition: all 0.3s ease;
+    }}
+
+    .stButton > button:hover {{
+        background-color: {THEME['accent']};
+        opacity: 0.8;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
+    }}
+</style>
+'''
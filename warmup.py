@@ -0,0 +1,69 @@
+"""Preload caches so the first page view after a restart is fast.
+
+warmup() imports the modules the pages load lazily and runs the reads
+the pages make on first view, which fills the shared query cache, the
+shared table snapshots and SQLite's page cache. The app calls it in a
+background thread when the server's Database is created and
+Config.WARMUP_ON_START is set.
+
+It can also be run before starting the server, which applies pending
+migrations and pulls the database file into the OS cache:
+
+    python warmup.py
+"""
+import importlib
+import threading
+import time
+
+from config import Config
+from snapshots import SNAPSHOTS
+
+# Modules imported by individual pages rather than at startup
+PAGE_MODULES = ['plotly.express', 'plotly.graph_objects', 'http_client']
+
+def warmup(db):
+    """Run each warmup step and return {step: seconds}"""
+    timings = {}
+    steps = [(f"import {name}", lambda name=name: importlib.import_module(name))
+             for name in PAGE_MODULES]
+    steps += [
+        ('get_dashboard_metrics', db.get_dashboard_metrics),
+        ('get_stock_movement', db.get_stock_movement),
+        ('get_stock_levels', db.get_stock_levels),
+        ('get_credit_aging', db.get_credit_aging),
+        ('get_daily_sales', db.get_daily_sales),
+        ('get_sales_by_category', db.get_sales_by_category),
+        ('get_inventory_page', db.get_inventory_page),
+        ('get_sales_page', db.get_sales_page),
+    ]
+    steps += [(f"snapshot {table}", lambda table=table: SNAPSHOTS.get(db, table))
+              for table in ('inventory', 'sales', 'credit_book')]
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Warmup step {name} failed: {e}")
+        timings[name] = time.perf_counter() - start
+    return timings
+
+def start_warmup(db):
+    """Warm up in a daemon thread so the first session isn't kept waiting"""
+    thread = threading.Thread(target=warmup, args=(db,), name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+def main():
+    from database import Database
+
+    start = time.perf_counter()
+    db = Database(Config.DB_PATH)
+    opened = time.perf_counter() - start
+    timings = warmup(db)
+    db.close()
+    print(f"{'open database':<28} {opened * 1000:>9.1f} ms")
+    for name, seconds in timings.items():
+        print(f"{name:<28} {seconds * 1000:>9.1f} ms")
+
+if __name__ == '__main__':
+    main()